@@ -32,7 +32,6 @@ import traceback
 
 # AI & Research
 import google.generativeai as genai
-from pytrends.request import TrendReq
 import praw  # Reddit API
 
 # Image handling
@@ -40,6 +39,9 @@ from PIL import Image, ImageDraw, ImageFont
 import base64
 from io import BytesIO
 
+from sayplay_history import HistoryStore
+from sayplay_timeseries import GoogleTrendsCollector
+
 # ============================================================================
 # SAYPLAY PRODUCT INFO
 # ============================================================================
@@ -304,10 +306,8 @@ class CompleteTrendResearch:
         return results
     
     def _research_google_trends(self) -> List[Dict]:
-        """Get Google Trends data for gift searches"""
+        """Get Google Trends data for gift searches (batched, incremental)"""
         try:
-            pytrends = TrendReq(hl='en-GB', tz=0)
-            
             keywords = [
                 'personalized gifts',
                 'voice message gift',
@@ -315,25 +315,10 @@ class CompleteTrendResearch:
                 'unique gifts UK'
             ]
             
-            results = []
-            
-            for kw in keywords:
-                try:
-                    pytrends.build_payload([kw], timeframe='today 3-m', geo='GB')
-                    interest = pytrends.interest_over_time()
-                    
-                    if not interest.empty:
-                        avg_interest = int(interest[kw].mean())
-                        results.append({
-                            'keyword': kw,
-                            'interest_score': avg_interest,
-                            'trend': 'rising' if avg_interest > 50 else 'stable'
-                        })
-                        print(f"   ✅ {kw}: {avg_interest}/100")
-                except:
-                    pass
-                time.sleep(2)
-            
+            # Shares the local time-series store with the complete system
+            results = GoogleTrendsCollector().collect(keywords)
+            for r in results:
+                print(f"   ✅ {r['keyword']}: {r['interest_score']}/100 ({r['trend']})")
             return results
         except Exception as e:
             print(f"   ⚠️ Google Trends failed: {str(e)[:50]}")
@@ -856,54 +841,21 @@ class CompletePublisher:
 # ============================================================================
 
 class ContentHistory:
-    """Track published content"""
+    """Track published content (shared indexed SQLite store, full history)"""
     
     def __init__(self, file: str = 'content_history.json'):
         self.file = file
-        self.history = self._load()
-    
-    def _load(self) -> List[Dict]:
-        if os.path.exists(self.file):
-            try:
-                with open(self.file, 'r') as f:
-                    data = json.load(f)
-                
-                # Migrate old entries
-                migrated = []
-                for entry in data:
-                    if 'theme' not in entry:
-                        entry['theme'] = entry.get('title', '').split('|')[0].strip()
-                    migrated.append(entry)
-                
-                return migrated
-            except:
-                return []
-        return []
+        self.store = HistoryStore(legacy_json=file)
     
     def save(self, entry: Dict):
-        self.history.append({
-            'date': datetime.now().isoformat(),
+        self.store.append({
             'title': entry.get('title', ''),
             'theme': entry.get('theme', ''),
             'platforms': entry.get('platforms', [])
         })
-        
-        # Keep 30 days
-        cutoff = datetime.now() - timedelta(days=30)
-        self.history = [
-            h for h in self.history
-            if datetime.fromisoformat(h['date']) > cutoff
-        ]
-        
-        with open(self.file, 'w') as f:
-            json.dump(self.history, f, indent=2)
     
     def get_recent_themes(self, days: int = 7) -> List[str]:
-        cutoff = datetime.now() - timedelta(days=days)
-        return [
-            h.get('theme', '') for h in self.history
-            if datetime.fromisoformat(h['date']) > cutoff and h.get('theme')
-        ]
+        return self.store.themes_since(datetime.now() - timedelta(days=days))
 
 # ============================================================================
 # MAIN ORCHESTRATOR
@@ -0,0 +1,248 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY CONTENT-ADDRESSED ASSET STORE
+=====================================
+
+Every generated or fallback image is stored once, keyed by its SHA-256:
+
+    assets/images/<sha256>.jpg
+    assets/manifest.json   (hash -> path, size, sources, aliases, refs)
+
+Identical images (e.g. the branded fallback) are written exactly once and
+simply referenced again on later runs.
+
+Public hosting (AssetHost) uploads each image once per content hash and
+caches the returned URL, so every publisher shares one upload.
+
+MIGRATION:
+    python sayplay_assets.py migrate
+collapses the old timestamped sayplay_*.jpg files in the repo root into
+the store and deletes the originals.
+"""
+
+import os
+import sys
+import json
+import glob
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sayplay_http import get_http_client
+
+ASSET_ROOT = 'assets'
+HOSTED_URLS_FILE = os.path.join('cache', 'hosted_urls.json')
+
+# ============================================================================
+# ASSET STORE
+# ============================================================================
+
+class AssetStore:
+    """Stores files by content hash and keeps a JSON manifest of them"""
+
+    _lock = threading.Lock()
+
+    def __init__(self, root: str = ASSET_ROOT):
+        self.root = root
+        self.image_dir = os.path.join(root, 'images')
+        self.manifest_file = os.path.join(root, 'manifest.json')
+        self.manifest = self._load_manifest()
+
+    def _load_manifest(self) -> Dict:
+        if os.path.exists(self.manifest_file):
+            try:
+                with open(self.manifest_file, 'r') as f:
+                    return json.load(f)
+            except:
+                pass
+        return {}
+
+    def _save_manifest(self):
+        os.makedirs(self.root, exist_ok=True)
+        tmp_file = self.manifest_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self.manifest, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.manifest_file)
+
+    def put_bytes(self, data: bytes, ext: str = '.jpg', source: str = '',
+                  alias: Optional[str] = None) -> str:
+        """Store data (once) and return the path of the stored copy"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = os.path.join(self.image_dir, f'{digest}{ext}')
+
+        with self._lock:
+            entry = self.manifest.get(digest)
+            if entry is None or not os.path.exists(entry['path']):
+                os.makedirs(self.image_dir, exist_ok=True)
+                tmp_file = path + '.tmp'
+                with open(tmp_file, 'wb') as f:
+                    f.write(data)
+                os.replace(tmp_file, path)
+                entry = {
+                    'path': path,
+                    'size': len(data),
+                    'created': datetime.now().isoformat(),
+                    'sources': [],
+                    'aliases': [],
+                    'refs': 0
+                }
+                self.manifest[digest] = entry
+
+            entry['refs'] += 1
+            entry['last_used'] = datetime.now().isoformat()
+            if source and source not in entry['sources']:
+                entry['sources'].append(source)
+            if alias and alias not in entry['aliases']:
+                entry['aliases'].append(alias)
+            self._save_manifest()
+
+        return entry['path']
+
+    def put_file(self, file_path: str, source: str = '', remove: bool = False) -> str:
+        """Store an existing file; optionally delete the original"""
+        with open(file_path, 'rb') as f:
+            data = f.read()
+        ext = os.path.splitext(file_path)[1] or '.jpg'
+        stored = self.put_bytes(data, ext=ext, source=source, alias=os.path.basename(file_path))
+        if remove and os.path.abspath(file_path) != os.path.abspath(stored):
+            os.remove(file_path)
+        return stored
+
+    def resolve(self, digest: str) -> Optional[str]:
+        entry = self.manifest.get(digest)
+        return entry['path'] if entry else None
+
+    def migrate(self, patterns: List[str]) -> Dict:
+        """Collapse loose image files matching patterns into the store"""
+        files = sorted({f for pattern in patterns for f in glob.glob(pattern)})
+        before = len(self.manifest)
+        saved_bytes = 0
+
+        for file_path in files:
+            source = os.path.basename(file_path).rsplit('_', 1)[0]
+            size = os.path.getsize(file_path)
+            digest_known = len(self.manifest)
+            self.put_file(file_path, source=source, remove=True)
+            if len(self.manifest) == digest_known:
+                saved_bytes += size
+
+        return {
+            'files': len(files),
+            'new_assets': len(self.manifest) - before,
+            'deduplicated_bytes': saved_bytes
+        }
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_asset_store() -> AssetStore:
+    """Process-wide shared store (one manifest in memory)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = AssetStore()
+        return _store
+
+# ============================================================================
+# PUBLIC HOSTING (upload once, reuse everywhere)
+# ============================================================================
+
+class AssetHost:
+    """Uploads an image once per content hash and caches its public URL"""
+
+    UPLOAD_URL = 'https://catbox.moe/user/api.php'
+
+    def __init__(self, cache_file: str = HOSTED_URLS_FILE, ttl: timedelta = timedelta(days=30)):
+        self.cache_file = cache_file
+        self.ttl = ttl
+        self.http = get_http_client()
+        self._lock = threading.Lock()
+        self._upload_locks = {}
+        self.urls = self._load()
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as f:
+                    return json.load(f)
+            except:
+                pass
+        return {}
+
+    def _save(self):
+        os.makedirs(os.path.dirname(self.cache_file) or '.', exist_ok=True)
+        tmp_file = self.cache_file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self.urls, f, indent=2, sort_keys=True)
+        os.replace(tmp_file, self.cache_file)
+
+    def _cached(self, digest: str) -> Optional[str]:
+        entry = self.urls.get(digest)
+        if not entry:
+            return None
+        try:
+            if datetime.now() - datetime.fromisoformat(entry['uploaded_at']) < self.ttl:
+                return entry['url']
+        except (KeyError, ValueError):
+            pass
+        return None
+
+    def public_url(self, image_path: str) -> str:
+        """Public URL for image_path, uploading only if not hosted yet"""
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+
+        with self._lock:
+            upload_lock = self._upload_locks.setdefault(digest, threading.Lock())
+
+        # Concurrent publishers wait for the first upload instead of repeating it
+        with upload_lock:
+            url = self._cached(digest)
+            if url:
+                print(f"   ♻️ Reusing hosted image: {url}")
+                return url
+
+            files = {'fileToUpload': (os.path.basename(image_path), data)}
+            response = self.http.post(self.UPLOAD_URL, data={'reqtype': 'fileupload'}, files=files, timeout=30)
+            url = response.text.strip()
+            if response.status_code != 200 or not url.startswith('http'):
+                raise Exception(f"Catbox upload failed: {response.status_code}")
+
+            with self._lock:
+                self.urls[digest] = {
+                    'url': url,
+                    'uploaded_at': datetime.now().isoformat(),
+                    'size': len(data)
+                }
+                self._save()
+            return url
+
+_host = None
+
+def get_asset_host() -> AssetHost:
+    """Process-wide shared hosting layer"""
+    global _host
+    with _store_lock:
+        if _host is None:
+            _host = AssetHost()
+        return _host
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    if len(sys.argv) < 2 or sys.argv[1] != 'migrate':
+        print("Usage: python sayplay_assets.py migrate")
+        return 1
+
+    store = get_asset_store()
+    stats = store.migrate(['sayplay_fallback_*.jpg', 'sayplay_post_*.jpg'])
+    print(f"✅ Migrated {stats['files']} files into {stats['new_assets']} new assets")
+    print(f"💾 Deduplicated {stats['deduplicated_bytes'] / 1024:.0f} KB")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,404 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY COMPETITOR CRAWLER
+==========================
+
+Change detection over competitors' sitemaps, blogs and RSS feeds.
+
+- Sitemap / feed documents fetched with conditional GETs (ETag /
+  Last-Modified); unchanged listings cost a 304 and nothing else
+- Competitors crawled concurrently; pages on one host fetched one at a
+  time with a politeness delay, and robots.txt respected
+- Page text fingerprinted with a 64-bit simhash; a page only counts as
+  changed when its fingerprint moves, not when a timestamp does
+- The first crawl of a competitor only records a baseline; later runs
+  report new and changed pages
+- Only blog/article sitemaps are tracked (remembered from the index
+  and re-checked every run), capped to the newest URLs
+- Bounded per run: pages per competitor and a deadline checked before
+  every request; state in cache/competitors.json is only written when
+  the crawl finished inside its deadline
+"""
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urljoin
+from urllib.robotparser import RobotFileParser
+import xml.etree.ElementTree as ET
+
+from sayplay_http import get_http_client
+
+COMPETITOR_CACHE_FILE = os.path.join('cache', 'competitors.json')
+USER_AGENT = 'SayPlayResearchBot/1.0 (+https://sayplay.co.uk)'
+
+# ============================================================================
+# SIMHASH
+# ============================================================================
+
+def simhash(text: str, bits: int = 64) -> int:
+    """Charikar simhash over 3-word shingles"""
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    shingles = [' '.join(words[i:i + 3]) for i in range(max(len(words) - 2, 1))]
+    weights = [0] * bits
+    for shingle in shingles:
+        h = int.from_bytes(hashlib.md5(shingle.encode('utf-8')).digest()[:bits // 8], 'big')
+        for bit in range(bits):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit in range(bits) if weights[bit] > 0)
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count('1')
+
+def _local(tag: str) -> str:
+    """'{namespace}loc' → 'loc'"""
+    return tag.rsplit('}', 1)[-1]
+
+class _PageText(HTMLParser):
+    """Title + visible text of a page (scripts, styles and chrome skipped)"""
+
+    SKIP = {'script', 'style', 'noscript', 'nav', 'footer', 'header', 'svg'}
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.title, self.parts = '', []
+        self._skip = 0
+        self._in_title = False
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP:
+            self._skip += 1
+        elif tag == 'title':
+            self._in_title = True
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP and self._skip:
+            self._skip -= 1
+        elif tag == 'title':
+            self._in_title = False
+
+    def handle_data(self, data):
+        if self._in_title:
+            self.title += data
+        elif not self._skip:
+            self.parts.append(data)
+
+def page_text(html: str) -> Tuple[str, str]:
+    """(title, whitespace-collapsed text)"""
+    parser = _PageText()
+    parser.feed(html)
+    parser.close()
+    return ' '.join(parser.title.split()), ' '.join(' '.join(parser.parts).split())
+
+# ============================================================================
+# CRAWLER
+# ============================================================================
+
+class CompetitorCrawler:
+    """Polite, incremental competitor crawl with simhash change detection"""
+
+    MAX_PAGES = 5            # page fetches per competitor per run
+    MAX_CHILD_SITEMAPS = 3
+    MAX_TRACKED_URLS = 300   # newest blog/article URLs per competitor (the file is committed daily)
+    MAX_PENDING = 100        # deferred candidates carried to the next run
+    CHANGE_BITS = 3          # simhash distance that counts as a real change
+    HOST_DELAY = 1.0
+    SAVE_GRACE = 2           # seconds past the deadline a finished crawl may still save
+    ROBOTS_TTL = timedelta(days=7)
+    CHILD_HINTS = ('blog', 'post', 'article', 'news', 'inspiration', 'ideas')
+
+    def __init__(self, competitors: List[Dict], path: str = COMPETITOR_CACHE_FILE,
+                 max_workers: int = 8, deadline: float = 15):
+        self.competitors = competitors
+        self.path = path
+        self.max_workers = max_workers
+        self.deadline = deadline
+        self.http = get_http_client()
+        self._lock = threading.Lock()
+        self.state = self._load()
+        self.stats = {'not_modified': 0, 'fetched': 0, 'pages': 0}
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except:
+                pass
+        return {}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_file = self.path + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_file, self.path)
+        except Exception as e:
+            print(f"   ⚠️ Could not save competitor cache: {str(e)[:50]}")
+
+    def _count(self, key: str):
+        with self._lock:
+            self.stats[key] += 1
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+
+    def _timeout(self, stop_at: float) -> float:
+        """Request timeout that can't run past the crawl deadline"""
+        remaining = stop_at - time.time()
+        if remaining < 1:
+            raise TimeoutError('crawl deadline reached')
+        return min(10, remaining)
+
+    def _conditional_get(self, validators: Dict, url: str, stop_at: float,
+                         conditional: bool = True) -> Optional[str]:
+        """
+        Body of url, or None when the server says it hasn't changed.
+        conditional=False always downloads (validators are still stored).
+        """
+        timeout = self._timeout(stop_at)
+        headers = {'User-Agent': USER_AGENT}
+        cached = validators.get(url, {}) if conditional else {}
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+        response = self.http.get(url, headers=headers, timeout=timeout)
+        if response.status_code == 304:
+            self._count('not_modified')
+            return None
+        response.raise_for_status()
+        self._count('fetched')
+        validators[url] = {
+            'etag': response.headers.get('ETag'),
+            'last_modified': response.headers.get('Last-Modified')
+        }
+        return response.text
+
+    def _robots(self, state: Dict, base_url: str, stop_at: float) -> RobotFileParser:
+        robots = state.setdefault('robots', {})
+        fresh = robots.get('fetched') and \
+            datetime.now() - datetime.fromisoformat(robots['fetched']) < self.ROBOTS_TTL
+        if not fresh:
+            try:
+                response = self.http.get(urljoin(base_url, '/robots.txt'),
+                                         headers={'User-Agent': USER_AGENT}, timeout=self._timeout(stop_at))
+                robots['lines'] = response.text.splitlines() if response.status_code == 200 else []
+            except:
+                robots['lines'] = robots.get('lines', [])
+            robots['fetched'] = datetime.now().isoformat()
+
+        parser = RobotFileParser()
+        parser.parse(robots.get('lines', []))
+        return parser
+
+    # ------------------------------------------------------------------
+    # Listings (sitemap index, urlset, RSS, Atom)
+    # ------------------------------------------------------------------
+
+    def _parse_listing(self, body: str) -> Tuple[List[str], List[Dict]]:
+        """(child sitemaps, [{'url', 'lastmod', 'title'}])"""
+        root = ET.fromstring(body.encode('utf-8'))
+        kind = _local(root.tag)
+        children, entries = [], []
+
+        if kind == 'sitemapindex':
+            for node in root:
+                loc = next((c.text for c in node if _local(c.tag) == 'loc'), None)
+                if loc:
+                    children.append(loc.strip())
+        elif kind == 'urlset':
+            for node in root:
+                fields = {_local(c.tag): (c.text or '').strip() for c in node}
+                if fields.get('loc'):
+                    entries.append({'url': fields['loc'], 'lastmod': fields.get('lastmod', ''), 'title': ''})
+        elif kind == 'rss':
+            for item in root.iter('item'):
+                fields = {_local(c.tag): (c.text or '').strip() for c in item}
+                if fields.get('link'):
+                    entries.append({'url': fields['link'], 'lastmod': fields.get('pubDate', ''),
+                                    'title': fields.get('title', '')})
+        elif kind == 'feed':
+            for entry in root:
+                if _local(entry.tag) != 'entry':
+                    continue
+                link = next((c.get('href') for c in entry if _local(c.tag) == 'link'), None)
+                fields = {_local(c.tag): (c.text or '').strip() for c in entry}
+                if link:
+                    entries.append({'url': link, 'lastmod': fields.get('updated', ''),
+                                    'title': fields.get('title', '')})
+        return children, entries
+
+    def _is_blog(self, url: str) -> bool:
+        return any(hint in url.lower() for hint in self.CHILD_HINTS)
+
+    def _listing(self, state: Dict, source: str, stop_at: float) -> List[Dict]:
+        """
+        Entries from every listing document that changed since last run.
+        The blog/article child sitemaps are remembered and re-checked every
+        run: new posts change them, not the sitemap index. Until a baseline
+        exists, every document is downloaded in full.
+        """
+        validators = state.setdefault('documents', {})
+        # Older state without the remembered children: re-read the index once
+        conditional = state.get('seeded', False) and 'children' in state
+        entries = []
+        body = self._conditional_get(validators, source, stop_at, conditional)
+        if body is not None:
+            children, entries = self._parse_listing(body)
+            # Only blog/article sitemaps are tracked - product and category
+            # sitemaps are huge and say nothing about content topics
+            state['children'] = [c for c in children if self._is_blog(c)][:self.MAX_CHILD_SITEMAPS]
+            if not children and any(self._is_blog(e['url']) for e in entries):
+                entries = [e for e in entries if self._is_blog(e['url'])]
+
+        for child in state.get('children', []):
+            try:
+                child_body = self._conditional_get(validators, child, stop_at, conditional)
+                if child_body is not None:
+                    entries.extend(self._parse_listing(child_body)[1])
+            except TimeoutError:
+                raise
+            except Exception as e:
+                print(f"   ⚠️ Sitemap {child[:50]} failed: {str(e)[:50]}")
+        return entries
+
+    # ------------------------------------------------------------------
+    # Pages
+    # ------------------------------------------------------------------
+
+    def _page(self, state: Dict, url: str, stop_at: float) -> Optional[Dict]:
+        body = self._conditional_get(state.setdefault('page_validators', {}), url, stop_at)
+        if body is None:
+            return None
+        self._count('pages')
+        title, text = page_text(body)
+        return {'title': title, 'text': text, 'simhash': simhash(text)}
+
+    def _newest(self, entries: List[Dict]) -> List[Dict]:
+        """Huge sitemaps: only the most recently modified URLs are tracked"""
+        if len(entries) <= self.MAX_TRACKED_URLS:
+            return entries
+        return sorted(entries, key=lambda e: e['lastmod'], reverse=True)[:self.MAX_TRACKED_URLS]
+
+    def _crawl(self, competitor: Dict, stop_at: float) -> List[Dict]:
+        name = competitor['name']
+        with self._lock:
+            state = self.state.setdefault(name, {'pages': {}, 'seeded': False})
+
+        source = competitor.get('feed') or competitor.get('sitemap') or urljoin(competitor['url'], '/sitemap.xml')
+        robots = self._robots(state, competitor['url'], stop_at)
+        entries = self._newest([
+            e for e in self._listing(state, source, stop_at) if robots.can_fetch(USER_AGENT, e['url'])
+        ])
+
+        pages = state['pages']
+        if not state['seeded']:
+            # First crawl: remember what exists, report nothing
+            for entry in entries:
+                pages[entry['url']] = {'lastmod': entry['lastmod'], 'title': entry['title']}
+            state['seeded'] = bool(entries)
+            print(f"   📌 {name}: baseline of {len(entries)} pages recorded")
+            return []
+
+        # Candidates deferred by earlier runs come back even if the listing is unchanged
+        candidates = {e['url']: e for e in state.get('pending', [])}
+        for e in entries:
+            if e['url'] not in pages or (e['lastmod'] and e['lastmod'] != pages[e['url']].get('lastmod')):
+                candidates[e['url']] = e
+        candidates = sorted(candidates.values(), key=lambda e: e['lastmod'], reverse=True)
+
+        diffs, pending, fetched = [], [], 0
+        for entry in candidates:
+            if pending or fetched >= self.MAX_PAGES or time.time() + self.HOST_DELAY >= stop_at:
+                # Over budget: no diff from the listing alone, fetched on a later run
+                pending.append(entry)
+                continue
+
+            if fetched:
+                time.sleep(self.HOST_DELAY)  # One request at a time per host
+            fetched += 1
+            previous = pages.get(entry['url'])
+            try:
+                page = self._page(state, entry['url'], stop_at)
+            except TimeoutError:
+                pending.append(entry)
+                continue
+            except Exception as e:
+                print(f"   ⚠️ {name} page failed: {str(e)[:50]}")
+                continue
+
+            record = {'lastmod': entry['lastmod'], 'title': entry['title'] or (previous or {}).get('title', '')}
+            if previous and previous.get('simhash'):
+                record['simhash'] = previous['simhash']
+            if page:
+                record.update(title=page['title'] or record['title'], simhash=str(page['simhash']))
+                if previous is None:
+                    change = 'new'
+                elif not previous.get('simhash'):
+                    change = None  # Baseline page: first fingerprint only
+                elif hamming(int(previous['simhash']), page['simhash']) <= self.CHANGE_BITS:
+                    change = None  # Timestamp moved, content didn't
+                else:
+                    change = 'changed'
+                if change:
+                    diffs.append({
+                        'name': name,
+                        'url': entry['url'],
+                        'title': record['title'],
+                        'change': change,
+                        'summary': page['text'][:200],
+                        'lastmod': entry['lastmod']
+                    })
+            pages[entry['url']] = record
+
+        state['pending'] = pending[:self.MAX_PENDING]
+        # Keep the tracked URL set (and its validators) bounded
+        if len(pages) > self.MAX_TRACKED_URLS:
+            newest = sorted(pages, key=lambda url: pages[url].get('lastmod', ''), reverse=True)
+            state['pages'] = {url: pages[url] for url in newest[:self.MAX_TRACKED_URLS]}
+        state['page_validators'] = {
+            url: v for url, v in state.get('page_validators', {}).items() if url in state['pages']
+        }
+        listings = {source, *state.get('children', [])}
+        state['documents'] = {url: v for url, v in state['documents'].items() if url in listings}
+        return diffs
+
+    def crawl(self) -> List[Dict]:
+        """
+        New/changed pages across all competitors since the last run. State
+        is saved only if the crawl finished in time - a result the caller
+        has already given up on must not mark its pages as seen.
+        """
+        stop_at = time.time() + self.deadline
+
+        def crawl_one(competitor):
+            try:
+                return self._crawl(competitor, stop_at)
+            except TimeoutError:
+                print(f"   ⏰ {competitor['name']} crawl hit the deadline")
+                return []
+            except Exception as e:
+                print(f"   ⚠️ {competitor['name']} crawl failed: {str(e)[:50]}")
+                return []
+
+        diffs = []
+        if self.competitors:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(self.competitors))) as executor:
+                for found in executor.map(crawl_one, self.competitors):
+                    diffs.extend(found)
+            if time.time() <= stop_at + self.SAVE_GRACE:
+                self.save()
+            else:
+                print("   ⏰ Competitor crawl finished late - state not saved")
+        return diffs
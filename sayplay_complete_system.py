@@ -23,22 +23,34 @@ import sys
 import json
 import time
 import random
-import requests
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, Iterator, List, Optional
 from urllib.parse import quote
-import re
 import traceback
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
 
 # AI & Research
 import google.generativeai as genai
-from pytrends.request import TrendReq
 import praw  # Reddit API
 
+# Shared infrastructure (HTTP pool, asset store, fallback images)
+from sayplay_http import get_http_client
+from sayplay_assets import get_asset_host, get_asset_store
+from sayplay_fallback import get_fallback_renderer
+from sayplay_llm_cache import get_response_cache
+from sayplay_history import HistoryStore
+from sayplay_quota import actual_tokens, estimate_tokens, get_quota
+from sayplay_timeseries import GoogleTrendsCollector
+from sayplay_reddit import RedditCollector
+from sayplay_social import SocialCollector
+from sayplay_tiktok import TikTokHashtagTracker
+from sayplay_competitors import CompetitorCrawler
+from sayplay_context import ContextBuilder
+from sayplay_structured import generate_structured
+
 # Image handling
-from PIL import Image, ImageDraw, ImageFont
 import base64
-from io import BytesIO
 
 # ============================================================================
 # SAYPLAY PRODUCT INFO
@@ -71,12 +83,18 @@ SAYPLAY_PRODUCT = {
     }
 }
 
+# Local caches (committed by the daily workflow, so they persist between runs)
+CACHE_DIR = 'cache'
+
 # ============================================================================
 # AI ORCHESTRATOR (WITH GEMINI)
 # ============================================================================
 
 class AIOrchestrator:
-    """Smart AI with dynamic model detection"""
+    """Smart AI with cached model detection"""
+    
+    MODEL_CACHE_FILE = os.path.join(CACHE_DIR, 'model_cache.json')
+    MODEL_CACHE_TTL = timedelta(days=7)
     
     def __init__(self):
         self.gemini_key = os.getenv('GEMINI_API_KEY')
@@ -87,28 +105,94 @@ class AIOrchestrator:
         
         genai.configure(api_key=self.gemini_key)
         
-        print("🔍 Detecting Gemini models...")
-        
-        # Dynamic detection
-        available = self._list_models()
-        
         # Fallback list
         self.model_priority = [
             'gemini-1.5-flash', 'gemini-1.5-flash-latest',
             'gemini-1.5-pro', 'gemini-1.0-pro', 'gemini-pro'
         ]
         
+        self.model = None
+        self.active_model = ""
+        self._model_lock = threading.Lock()
+        self.model_cache = self._load_model_cache()
+        self.response_cache = get_response_cache()
+        
+        # Known-good model from a previous run: no network calls needed
+        cached = self._cached_model()
+        if cached:
+            self.model = genai.GenerativeModel(cached)
+            self.active_model = cached
+            print(f"⚡ Using cached model: {cached}")
+        else:
+            self._detect_model()
+        
+        if not self.model:
+            print("❌ No working model found!")
+            sys.exit(1)
+        
+        print(f"✅ Active Model: {self.active_model}\n")
+    
+    def _load_model_cache(self) -> Dict:
+        if os.path.exists(self.MODEL_CACHE_FILE):
+            try:
+                with open(self.MODEL_CACHE_FILE, 'r') as f:
+                    return json.load(f)
+            except:
+                pass
+        return {'model': '', 'verified_at': '', 'failed': {}}
+    
+    def _save_model_cache(self):
+        try:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            with open(self.MODEL_CACHE_FILE, 'w') as f:
+                json.dump(self.model_cache, f, indent=2)
+        except Exception as e:
+            print(f"   ⚠️ Could not save model cache: {str(e)[:50]}")
+    
+    def _cached_model(self) -> str:
+        """Return the cached model if it was verified within the TTL"""
+        model = self.model_cache.get('model')
+        verified_at = self.model_cache.get('verified_at')
+        if not model or not verified_at:
+            return ""
+        try:
+            if datetime.now() - datetime.fromisoformat(verified_at) < self.MODEL_CACHE_TTL:
+                return model
+        except ValueError:
+            pass
+        return ""
+    
+    def _recently_failed(self, model_name: str) -> bool:
+        failed_at = self.model_cache.get('failed', {}).get(model_name)
+        if not failed_at:
+            return False
+        try:
+            return datetime.now() - datetime.fromisoformat(failed_at) < self.MODEL_CACHE_TTL
+        except ValueError:
+            return False
+    
+    def _detect_model(self):
+        """Probe models live and cache the first one that answers"""
+        print("🔍 Detecting Gemini models...")
+        
+        # Dynamic detection
+        available = self._list_models()
+        
+        candidates = list(self.model_priority)
         if available:
             for m in available:
-                if m not in self.model_priority:
-                    self.model_priority.insert(0, m)
+                if m not in candidates:
+                    candidates.insert(0, m)
+        
+        # Models that failed recently are only tried as a last resort
+        candidates.sort(key=self._recently_failed)
         
         # Test models
         print("🚀 Testing models...")
         self.model = None
         self.active_model = ""
         
-        for model_name in self.model_priority:
+        for model_name in candidates:
             try:
                 print(f"   Testing {model_name}...", end=" ")
                 test = genai.GenerativeModel(model_name)
@@ -118,14 +202,54 @@ class AIOrchestrator:
                     self.active_model = model_name
                     print("✅")
                     break
-            except:
+            except Exception as e:
                 print("❌")
-        
-        if not self.model:
-            print("❌ No working model found!")
-            sys.exit(1)
-        
-        print(f"✅ Active Model: {self.active_model}\n")
+                # Rate limits or blocked replies say nothing about the model itself
+                if self._model_gone(e):
+                    self.model_cache.setdefault('failed', {})[model_name] = datetime.now().isoformat()
+        
+        if self.model:
+            self.model_cache['model'] = self.active_model
+            self.model_cache['verified_at'] = datetime.now().isoformat()
+            self.model_cache.get('failed', {}).pop(self.active_model, None)
+        self._save_model_cache()
+    
+    @staticmethod
+    def _is_quota_error(error: Exception) -> bool:
+        return "429" in str(error) or "quota" in str(error).lower()
+    
+    @staticmethod
+    def _model_gone(error: Exception) -> bool:
+        """Model not found / not allowed - the only errors that justify a re-probe"""
+        text = f"{type(error).__name__} {error}".lower()
+        return any(marker in text for marker in (
+            '404', 'notfound', 'not found', '403', 'permissiondenied', 'permission',
+            'not supported for generatecontent'
+        ))
+    
+    def _invalidate_model(self, failed_model: str, error: Exception) -> bool:
+        """
+        Drop the cached model after it disappeared and re-probe. Concurrent
+        callers wait on the lock; whoever comes second sees the switch
+        already made. True when a different model is now active.
+        """
+        with self._model_lock:
+            if self.active_model != failed_model:
+                return True
+            print(f"   ⚠️ Model {failed_model} failed: {str(error)[:50]}")
+            self.model_cache.setdefault('failed', {})[failed_model] = datetime.now().isoformat()
+            self.model_cache['model'] = ''
+            self.model_cache['verified_at'] = ''
+            
+            previous = (self.model, self.active_model)
+            self._detect_model()
+            if not self.model:
+                self.model, self.active_model = previous
+            return self.active_model != failed_model
+    
+    def remaining_budget(self) -> Dict:
+        """Today's Gemini usage and remaining requests for the active model"""
+        return get_quota(self.active_model).remaining()
     
     def _list_models(self) -> List[str]:
         try:
@@ -137,20 +261,192 @@ class AIOrchestrator:
         except:
             return []
     
-    def generate(self, prompt: str, max_retries: int = 3) -> str:
-        for attempt in range(max_retries):
-            try:
-                config = {'max_output_tokens': 2048, 'temperature': 0.7}
-                response = self.model.generate_content(prompt, generation_config=config)
-                return response.text
-            except Exception as e:
-                if "429" in str(e) or "quota" in str(e).lower():
-                    wait = (2 ** attempt) * 5
-                    print(f"   ⏳ Rate limit, waiting {wait}s...")
-                    time.sleep(wait)
-                else:
-                    time.sleep(2)
+    def generate(self, prompt: str, max_retries: int = 3, use_cache: bool = True,
+                 config: Optional[Dict] = None,
+                 cache_if: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        cache_if(text) decides whether an answer is good enough to be
+        reused for 24h; by default every non-empty answer is.
+        """
+        config = {'max_output_tokens': 2048, 'temperature': 0.7, **(config or {})}
+        
+        # Identical prompt answered recently: reuse it, no quota spent
+        if use_cache:
+            cached = self.response_cache.get(self.response_cache.key(self.active_model, prompt, config))
+            if cached is not None:
+                print("   ⚡ Using cached AI response")
+                return cached
+        
+        estimated = estimate_tokens(prompt) + config['max_output_tokens']
+        for switched in (False, True):
+            model, model_name = self.model, self.active_model
+            gone = None
+            for attempt in range(max_retries):
+                # Stay under RPM/TPM and today's budget before spending a call
+                quota = get_quota(model_name)
+                if not quota.acquire(estimated):
+                    return ""
+                try:
+                    response = model.generate_content(prompt, generation_config=config)
+                    quota.record(estimated, actual_tokens(response, prompt, response.text))
+                    if use_cache and response.text and (cache_if is None or cache_if(response.text)):
+                        key = self.response_cache.key(model_name, prompt, config)
+                        self.response_cache.put(key, response.text, model=model_name)
+                    return response.text
+                except Exception as e:
+                    quota.record(estimated, estimate_tokens(prompt))
+                    if self._is_quota_error(e):
+                        wait = (2 ** attempt) * 5
+                        print(f"   ⏳ Rate limit, waiting {wait}s...")
+                        time.sleep(wait)
+                    elif self._model_gone(e):
+                        gone = e
+                        break
+                    else:
+                        time.sleep(2)
+            
+            # The model itself is gone: switch once and retry on the new one
+            if gone is None or switched or not self._invalidate_model(model_name, gone):
+                break
         return ""
+    
+    def generate_json(self, prompt: str, schema: Dict, max_repairs: int = 1) -> Optional[Dict]:
+        """Schema-validated JSON; only malformed fields are re-asked. None if unrepairable"""
+        return generate_structured(
+            lambda text, config, cache_if: self.generate(text, config=config, use_cache=cache_if is not None,
+                                                         cache_if=cache_if),
+            prompt, schema, max_repairs=max_repairs
+        )
+    
+    def generate_stream(self, prompt: str, max_retries: int = 3, use_cache: bool = True,
+                        cache_if: Optional[Callable[[str], bool]] = None) -> Iterator[str]:
+        """
+        Yield the response in chunks as Gemini produces them.
+        Retries only before the first chunk; a failure mid-stream raises
+        so the caller can fall back instead of using a truncated answer.
+        Only complete answers that pass cache_if(text) are cached.
+        """
+        config = {'max_output_tokens': 2048, 'temperature': 0.7}
+        
+        if use_cache:
+            cached = self.response_cache.get(self.response_cache.key(self.active_model, prompt, config))
+            if cached is not None:
+                print("   ⚡ Using cached AI response")
+                yield cached
+                return
+        
+        estimated = estimate_tokens(prompt) + config['max_output_tokens']
+        for switched in (False, True):
+            model, model_name = self.model, self.active_model
+            gone = None
+            for attempt in range(max_retries):
+                quota = get_quota(model_name)
+                if not quota.acquire(estimated):
+                    return
+                received = []
+                used = None
+                try:
+                    try:
+                        response = model.generate_content(prompt, generation_config=config, stream=True)
+                        for chunk in response:
+                            text = chunk.text
+                            if text:
+                                received.append(text)
+                                yield text
+                        used = actual_tokens(response, prompt, ''.join(received))
+                    finally:
+                        # Also runs when the caller abandons the stream (GeneratorExit),
+                        # so tokens already generated are still counted
+                        if used is None:
+                            used = estimate_tokens(prompt) + estimate_tokens(''.join(received))
+                        quota.record(estimated, used)
+                    
+                    text = ''.join(received)
+                    if use_cache and text and (cache_if is None or cache_if(text)):
+                        key = self.response_cache.key(model_name, prompt, config)
+                        self.response_cache.put(key, text, model=model_name)
+                    return
+                except Exception as e:
+                    if received:
+                        raise
+                    if self._is_quota_error(e):
+                        wait = (2 ** attempt) * 5
+                        print(f"   ⏳ Rate limit, waiting {wait}s...")
+                        time.sleep(wait)
+                    elif self._model_gone(e):
+                        gone = e
+                        break
+                    else:
+                        time.sleep(2)
+            
+            if gone is None or switched or not self._invalidate_model(model_name, gone):
+                break
+
+# ============================================================================
+# DRAFT QUEUE (pre-generated blogs for future runs)
+# ============================================================================
+
+class DraftQueue:
+    """
+    Blog drafts generated ahead of time for spare trend themes.
+    Later runs publish from here before calling the model again, which
+    also gives a buffer when Gemini is rate-limited.
+    """
+    
+    QUEUE_FILE = os.path.join(CACHE_DIR, 'draft_queue.json')
+    MAX_AGE = timedelta(days=21)
+    MAX_DRAFTS = 6
+    
+    def __init__(self, file: str = QUEUE_FILE):
+        self.file = file
+        self._lock = threading.Lock()
+        self.drafts = self._load()
+    
+    def _load(self) -> List[Dict]:
+        if os.path.exists(self.file):
+            try:
+                with open(self.file, 'r') as f:
+                    drafts = json.load(f)
+                cutoff = datetime.now() - self.MAX_AGE
+                return [d for d in drafts if datetime.fromisoformat(d['created']) > cutoff]
+            except:
+                pass
+        return []
+    
+    def _save(self):
+        os.makedirs(os.path.dirname(self.file) or '.', exist_ok=True)
+        tmp_file = self.file + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump(self.drafts, f, indent=2)
+        os.replace(tmp_file, self.file)
+    
+    def __len__(self) -> int:
+        return len(self.drafts)
+    
+    def themes(self) -> List[str]:
+        with self._lock:
+            return [d['theme'] for d in self.drafts]
+    
+    def has(self, theme: str) -> bool:
+        return theme in self.themes()
+    
+    def put(self, theme: str, blog: Dict) -> bool:
+        with self._lock:
+            if len(self.drafts) >= self.MAX_DRAFTS or any(d['theme'] == theme for d in self.drafts):
+                return False
+            self.drafts.append({'theme': theme, 'blog': blog, 'created': datetime.now().isoformat()})
+            self._save()
+            return True
+    
+    def take(self, theme: str) -> Optional[Dict]:
+        """Remove and return the draft blog for theme, if queued"""
+        with self._lock:
+            for i, draft in enumerate(self.drafts):
+                if draft['theme'] == theme:
+                    self.drafts.pop(i)
+                    self._save()
+                    return draft['blog']
+        return None
 
 # ============================================================================
 # TREND RESEARCH ENGINE (COMPLETE!)
@@ -166,8 +462,35 @@ class CompleteTrendResearch:
     - Competitor monitoring
     """
     
-    def __init__(self, ai: AIOrchestrator):
+    THEMES_SCHEMA = {
+        'type': 'object',
+        'properties': {
+            'themes': {
+                'type': 'array',
+                'items': {'type': 'string', 'minLength': 10},
+                'minItems': 3,
+                'maxItems': 5
+            }
+        },
+        'required': ['themes']
+    }
+    
+    # Token budget for the research context in the analysis prompt
+    CONTEXT_TOKENS = 600
+    
+    # Per-source deadlines (seconds) for the concurrent fan-out
+    SOURCE_DEADLINES = {
+        'twitter': 45,
+        'reddit': 45,
+        'google_trends': 60,
+        'tiktok': 20,
+        'competitors': 20
+    }
+    
+    def __init__(self, ai: AIOrchestrator, drafts: Optional[DraftQueue] = None):
         self.ai = ai
+        self.drafts = drafts
+        self.http = get_http_client()
         
     def research_all_trends(self) -> Dict:
         print("=" * 80)
@@ -180,134 +503,102 @@ class CompleteTrendResearch:
             'google_trends': [],
             'tiktok': [],
             'competitors': [],
+            'timed_out': [],
             'analysis': {'themes': []}
         }
         
-        # 1. Twitter/X Research
-        print("\n🐦 Twitter/X Gift Trends...")
-        trends['twitter'] = self._research_twitter()
-        
-        # 2. Reddit Research
-        print("🔴 Reddit Discussions...")
-        trends['reddit'] = self._research_reddit()
-        
-        # 3. Google Trends
-        print("📈 Google Trends...")
-        trends['google_trends'] = self._research_google_trends()
+        # 1-5. All sources run at the same time, each with its own deadline
+        sources = {
+            'twitter': ("🐦 Twitter/X Gift Trends", self._research_twitter),
+            'reddit': ("🔴 Reddit Discussions", self._research_reddit),
+            'google_trends': ("📈 Google Trends", self._research_google_trends),
+            'tiktok': ("📱 TikTok Trends", self._research_tiktok),
+            'competitors': ("🕵️ Competitor Analysis", self._monitor_competitors)
+        }
         
-        # 4. TikTok Trends
-        print("📱 TikTok Trends...")
-        trends['tiktok'] = self._research_tiktok()
+        print("\n⚡ Researching all sources concurrently...")
+        executor = ThreadPoolExecutor(max_workers=len(sources))
+        started = time.time()
+        futures = {}
+        for name, (label, research_fn) in sources.items():
+            print(f"   {label}...")
+            futures[name] = executor.submit(research_fn)
+        
+        for name, future in futures.items():
+            deadline = self.SOURCE_DEADLINES.get(name, 30)
+            remaining = max(deadline - (time.time() - started), 0)
+            try:
+                trends[name] = future.result(timeout=remaining)
+            except FutureTimeout:
+                trends['timed_out'].append(name)
+                print(f"   ⏰ {name} timed out after {deadline}s")
+            except Exception as e:
+                print(f"   ⚠️ {name} failed: {str(e)[:50]}")
         
-        # 5. Competitor Monitoring
-        print("🕵️ Competitor Analysis...")
-        trends['competitors'] = self._monitor_competitors()
+        # Don't wait for stragglers - their results are discarded
+        executor.shutdown(wait=False, cancel_futures=True)
+        print(f"   ⏱️ Research sources finished in {time.time() - started:.1f}s")
         
-        # 6. AI Analysis
-        print("🤖 AI Trend Analysis...")
-        trends['analysis'] = self._analyze_trends(trends)
+        # 6. AI Analysis (skipped while pre-generated drafts are waiting;
+        # the collectors still run for today's hashtags and time series)
+        if self.drafts and len(self.drafts):
+            print(f"📦 {len(self.drafts)} queued drafts - skipping AI trend analysis")
+            trends['analysis'] = {'themes': self.drafts.themes()}
+        else:
+            print("🤖 AI Trend Analysis...")
+            trends['analysis'] = self._analyze_trends(trends)
         
         return trends
     
     def _research_twitter(self) -> List[Dict]:
-        """Research Twitter/X for gift trends (using free scraping)"""
+        """Research Twitter/X for gift trends (concurrent, incremental)"""
+        queries = [
+            'personalized gifts UK',
+            'voice message gifts',
+            'creative gift ideas 2025'
+        ]
+        
         try:
-            from ntscraper import Nitter
-            
-            scraper = Nitter()
-            
-            queries = [
-                'personalized gifts UK',
-                'voice message gifts',
-                'creative gift ideas 2025'
-            ]
-            
-            results = []
-            for query in queries:
-                try:
-                    tweets = scraper.get_tweets(query, mode='term', number=10)
-                    for tweet in tweets['tweets'][:5]:
-                        results.append({
-                            'text': tweet['text'][:200],
-                            'likes': tweet.get('stats', {}).get('likes', 0),
-                            'source': 'twitter'
-                        })
-                    print(f"   ✅ Found {len(tweets['tweets'])} tweets for '{query}'")
-                except:
-                    pass
-                time.sleep(2)
-            
-            return results
+            return SocialCollector().collect(queries)
         except Exception as e:
             print(f"   ⚠️ Twitter research failed: {str(e)[:50]}")
             return []
     
     def _research_reddit(self) -> List[Dict]:
-        """Research Reddit for gift discussions"""
-        try:
-            # Reddit credentials (read-only, public)
+        """Research Reddit for gift discussions (one combined listing, ranked by momentum)"""
+        subreddits = ['gifts', 'wedding', 'WeddingPlanning', 'GiftIdeas']
+        
+        reddit = None
+        if os.getenv('REDDIT_CLIENT_ID'):
+            # Reddit credentials (read-only)
             reddit = praw.Reddit(
-                client_id=os.getenv('REDDIT_CLIENT_ID', 'manual_reddit_check'),
+                client_id=os.getenv('REDDIT_CLIENT_ID'),
                 client_secret=os.getenv('REDDIT_CLIENT_SECRET', 'none'),
                 user_agent='SayPlay Marketing Research 1.0'
             )
-            
-            subreddits = ['gifts', 'wedding', 'WeddingPlanning', 'GiftIdeas']
-            results = []
-            
-            for sub in subreddits:
-                try:
-                    subreddit = reddit.subreddit(sub)
-                    for post in subreddit.hot(limit=5):
-                        results.append({
-                            'title': post.title,
-                            'score': post.score,
-                            'comments': post.num_comments,
-                            'subreddit': sub,
-                            'url': f"https://reddit.com{post.permalink}"
-                        })
-                    print(f"   ✅ Found {len(results)} posts in r/{sub}")
-                except:
-                    pass
-            
-            return results
-        except Exception as e:
-            print(f"   ⚠️ Reddit research failed: {str(e)[:50]}")
-            return self._reddit_fallback()
-    
-    def _reddit_fallback(self) -> List[Dict]:
-        """Fallback: scrape Reddit without API"""
-        results = []
-        subreddits = ['gifts', 'wedding']
         
-        for sub in subreddits:
+        collector = RedditCollector(subreddits, reddit=reddit)
+        try:
+            stats = collector.refresh()
+        except Exception as e:
+            if reddit is None:
+                print(f"   ⚠️ Reddit research failed: {str(e)[:50]}")
+                return collector.top()
+            print(f"   ⚠️ Reddit API failed, using public listing: {str(e)[:50]}")
+            collector = RedditCollector(subreddits)
             try:
-                url = f"https://www.reddit.com/r/{sub}/hot.json?limit=5"
-                headers = {'User-Agent': 'Mozilla/5.0'}
-                response = requests.get(url, headers=headers, timeout=10)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    for post in data['data']['children']:
-                        p = post['data']
-                        results.append({
-                            'title': p['title'],
-                            'score': p['score'],
-                            'comments': p['num_comments'],
-                            'subreddit': sub
-                        })
-                    print(f"   ✅ Scraped r/{sub}")
-            except:
-                pass
-            time.sleep(2)
+                stats = collector.refresh()
+            except Exception as e:
+                print(f"   ⚠️ Reddit research failed: {str(e)[:50]}")
+                return collector.top()
         
+        results = collector.top()
+        print(f"   ✅ r/{'+'.join(subreddits)}: {stats['new']} new posts, {stats['refreshed']} re-polled")
         return results
     
     def _research_google_trends(self) -> List[Dict]:
-        """Get Google Trends data for gift searches"""
+        """Get Google Trends data for gift searches (batched, incremental)"""
         try:
-            pytrends = TrendReq(hl='en-GB', tz=0)
-            
             keywords = [
                 'personalized gifts',
                 'voice message gift',
@@ -315,90 +606,79 @@ class CompleteTrendResearch:
                 'unique gifts UK'
             ]
             
-            results = []
-            
-            for kw in keywords:
-                try:
-                    pytrends.build_payload([kw], timeframe='today 3-m', geo='GB')
-                    interest = pytrends.interest_over_time()
-                    
-                    if not interest.empty:
-                        avg_interest = int(interest[kw].mean())
-                        results.append({
-                            'keyword': kw,
-                            'interest_score': avg_interest,
-                            'trend': 'rising' if avg_interest > 50 else 'stable'
-                        })
-                        print(f"   ✅ {kw}: {avg_interest}/100")
-                except:
-                    pass
-                time.sleep(2)
-            
+            results = GoogleTrendsCollector().collect(keywords)
+            for r in results:
+                delta = f", {r['delta_7d']:+.0f}% 7d" if r['delta_7d'] is not None else ''
+                print(f"   ✅ {r['keyword']}: {r['interest_score']}/100 ({r['trend']}{delta})")
             return results
         except Exception as e:
             print(f"   ⚠️ Google Trends failed: {str(e)[:50]}")
             return []
     
     def _research_tiktok(self) -> List[Dict]:
-        """Get TikTok trending hashtags"""
+        """Get TikTok hashtag view/video counts (parallel, snapshot-backed)"""
         try:
-            # TikTok trending (via scraping popular hashtags)
             hashtags = [
                 'giftideas', 'personalizedgifts', 'uniquegifts',
                 'weddinggifts', 'creativegifts', 'giftinspo'
             ]
-            
-            results = []
-            for tag in hashtags:
-                results.append({
-                    'hashtag': f'#{tag}',
-                    'estimated_views': 'High',
-                    'relevance': 'gifts'
-                })
-            
-            print(f"   ✅ Tracked {len(hashtags)} TikTok hashtags")
-            return results
+            # Stays inside the fan-out deadline for this source
+            return TikTokHashtagTracker(hashtags, deadline=self.SOURCE_DEADLINES['tiktok'] - 5).collect()
         except Exception as e:
             print(f"   ⚠️ TikTok research failed: {str(e)[:50]}")
             return []
     
     def _monitor_competitors(self) -> List[Dict]:
-        """Monitor competitor activity"""
+        """Crawl competitor sitemaps/blogs and report new or changed pages"""
         competitors = [
             {'name': 'Moonpig', 'url': 'https://www.moonpig.com'},
             {'name': 'Funky Pigeon', 'url': 'https://www.funkypigeon.com'},
             {'name': 'Not On The High Street', 'url': 'https://www.notonthehighstreet.com'},
-            {'name': 'Prezzybox', 'url': 'https://www.prezzybox.com'}
+            {'name': 'Prezzybox', 'url': 'https://www.prezzybox.com', 'feed': 'https://www.prezzybox.com/blog/feed/'}
         ]
         
-        results = []
-        for comp in competitors:
-            results.append({
-                'name': comp['name'],
-                'url': comp['url'],
-                'status': 'monitored',
-                'focus': 'personalized gifts'
-            })
+        # Stays inside the fan-out deadline for this source
+        crawler = CompetitorCrawler(competitors, deadline=self.SOURCE_DEADLINES['competitors'] - 5)
+        results = crawler.crawl()
         
-        print(f"   ✅ Monitoring {len(competitors)} competitors")
+        stats = crawler.stats
+        print(f"   ✅ Monitoring {len(competitors)} competitors: {len(results)} new/changed pages "
+              f"({stats['not_modified']} listings unchanged, {stats['pages']} pages fetched)")
         return results
     
     def _analyze_trends(self, trends: Dict) -> Dict:
         """AI analyzes all trends and generates themes"""
         
-        # Compile all trend data
-        all_data = []
+        # Rank, dedupe and pack the research into a fixed token budget
+        context = ContextBuilder(budget_tokens=self.CONTEXT_TOKENS)
         
-        for tweet in trends['twitter'][:10]:
-            all_data.append(f"Twitter: {tweet['text']}")
+        for tweet in trends['twitter']:
+            context.add("Twitter", tweet['text'], tweet.get('likes', 0), when=tweet.get('created') or None)
         
-        for post in trends['reddit'][:10]:
-            all_data.append(f"Reddit: {post['title']}")
+        for post in trends['reddit']:
+            context.add("Reddit", f"{post['title']} (r/{post['subreddit']})",
+                        post.get('velocity', post.get('score', 0)), when=post.get('created'))
         
         for trend in trends['google_trends']:
-            all_data.append(f"Google Trends: {trend['keyword']} ({trend['interest_score']}/100)")
-        
-        trend_text = "\n".join(all_data[:30])
+            delta = f", {trend['delta_7d']:+.0f}% 7d" if trend.get('delta_7d') is not None else ''
+            context.add("Google Trends",
+                        f"{trend['keyword']} ({trend['interest_score']}/100, {trend['trend']}{delta})",
+                        trend['interest_score'] * (1 + max(trend.get('slope', 0), 0)))
+        
+        for tag in trends['tiktok']:
+            if tag.get('views'):
+                growth = f", {tag['growth_per_day']:+.1f}%/day" if tag.get('growth_per_day') is not None else ''
+                context.add("TikTok", f"{tag['hashtag']} ({tag['views']:,} views{growth})",
+                            tag.get('growth_per_day') or 0)
+        
+        for page in trends['competitors']:
+            context.add(f"Competitor {page['change']} page", f"{page['name']}: {page['title'] or page['url']}",
+                        2 if page['change'] == 'new' else 1, when=page.get('lastmod') or None)
+        
+        trend_text = context.build()
+        report = context.report
+        print(f"   🧮 Context: {report['selected']}/{report['candidates']} items, "
+              f"{report['tokens']}/{report['budget']} tokens ({report['duplicates']} duplicates dropped)")
         
         prompt = f"""
 Analyze these current gift and personalization trends:
@@ -410,21 +690,13 @@ Generate 5 blog post topics for SayPlay voice message stickers that:
 2. Are SEO-friendly
 3. Include "2025" or "UK" where relevant
 4. Appeal to our target audience (gifts, weddings, personalization)
-
-Return JSON only:
-{{"themes": ["Theme 1", "Theme 2", "Theme 3", "Theme 4", "Theme 5"]}}
 """
         
-        try:
-            analysis = self.ai.generate(prompt)
-            json_match = re.search(r'\{.*\}', analysis, re.DOTALL)
-            if json_match:
-                data = json.loads(json_match.group())
-                themes = data.get('themes', [])
-                print(f"   ✅ Generated {len(themes)} trend-based themes")
-                return {'themes': themes}
-        except:
-            pass
+        data = self.ai.generate_json(prompt, self.THEMES_SCHEMA)
+        if data:
+            themes = data['themes']
+            print(f"   ✅ Generated {len(themes)} trend-based themes")
+            return {'themes': themes}
         
         # Fallback themes
         fallback = {
@@ -443,30 +715,82 @@ Return JSON only:
 # CONTENT GENERATOR
 # ============================================================================
 
+class StreamingBlogParser:
+    """Parse Title:/Meta:/Tags: headers from a streamed blog as lines complete"""
+    
+    def __init__(self):
+        self.chunks = []
+        self.length = 0
+        self._pending = ''
+        self.blog = {
+            'title': '',
+            'meta_description': '',
+            'tags': [],
+            'html_content': ''
+        }
+    
+    def feed(self, chunk: str):
+        self.chunks.append(chunk)
+        self.length += len(chunk)
+        self._pending += chunk
+        *lines, self._pending = self._pending.split('\n')
+        for line in lines:
+            self._parse_line(line)
+    
+    def close(self) -> Dict:
+        if self._pending:
+            self._parse_line(self._pending)
+            self._pending = ''
+        self.blog['html_content'] = ''.join(self.chunks).strip()
+        return self.blog
+    
+    def _parse_line(self, line: str):
+        if line.startswith('Title:') and not self.blog['title']:
+            self.blog['title'] = line.replace('Title:', '').strip()
+        elif line.startswith('Meta:'):
+            self.blog['meta_description'] = line.replace('Meta:', '').strip()
+        elif line.startswith('Tags:'):
+            self.blog['tags'] = [t.strip() for t in line.replace('Tags:', '').split(',')]
+
 class ContentGenerator:
     """Generate SEO-optimized blog posts and social media content"""
     
-    def __init__(self, ai: AIOrchestrator):
+    # Spare themes drafted per run (concurrently) for future days
+    DRAFT_BATCH = 2
+    # Shorter answers are truncated or refusals: never cached, never published
+    MIN_BLOG_CHARS = 200
+    # A blog reply must show its Title: header within this many chars
+    HEADER_CHARS = 500
+    
+    def __init__(self, ai: AIOrchestrator, drafts: Optional[DraftQueue] = None):
         self.ai = ai
+        self.drafts = drafts
+    
+    def select_theme(self, trends: Dict) -> str:
+        themes = trends.get('analysis', {}).get('themes', [])
+        return themes[0] if themes else "Voice Message Gifts - Ultimate Guide 2025"
     
-    def generate_complete_campaign(self, trends: Dict) -> Dict:
+    def generate_complete_campaign(self, trends: Dict, theme: Optional[str] = None) -> Dict:
         print("\n" + "=" * 80)
         print("STEP 2: CONTENT GENERATION")
         print("=" * 80)
         
         # Select theme
-        themes = trends.get('analysis', {}).get('themes', [])
-        theme = themes[0] if themes else "Voice Message Gifts - Ultimate Guide 2025"
+        theme = theme or self.select_theme(trends)
         
         print(f"\n🎯 Selected Theme: {theme}")
         
-        # Generate blog post
-        print("\n📝 Generating Blog Post...")
-        blog = self._generate_blog(theme, trends)
+        # Use a pre-generated draft if one is queued for this theme
+        blog = self.drafts.take(theme) if self.drafts else None
+        if blog:
+            print("\n📦 Using queued draft (no AI call)")
+        else:
+            print("\n📝 Generating Blog Post...")
+            blog = self._generate_blog(theme, trends)
         
         # Generate social media posts
         print("📱 Generating Social Media Posts...")
-        social = self._generate_social_posts(blog)
+        social = self._generate_social_posts(blog, trends.get('tiktok', []))
         
         return {
             'blog': blog,
@@ -474,8 +798,43 @@ class ContentGenerator:
             'theme': theme
         }
     
+    def prefill_drafts(self, trends: Dict, theme: str) -> List[str]:
+        """
+        Draft the spare trend themes (concurrently) into the queue so later
+        runs can skip both the analysis and the blog generation.
+        """
+        if not self.drafts:
+            return []
+        
+        themes = trends.get('analysis', {}).get('themes', [])
+        spare = [t for t in themes if t != theme and not self.drafts.has(t)]
+        spare = spare[:max(min(self.DRAFT_BATCH, self.drafts.MAX_DRAFTS - len(self.drafts)), 0)]
+        if not spare:
+            return []
+        
+        print(f"\n📦 Drafting {len(spare)} spare themes for future runs...")
+        with ThreadPoolExecutor(max_workers=len(spare)) as executor:
+            blogs = list(executor.map(lambda t: self._stream_blog(t), spare))
+        
+        queued = [t for t, blog in zip(spare, blogs) if blog and self.drafts.put(t, blog)]
+        print(f"   ✅ Queued {len(queued)} drafts ({len(self.drafts)} waiting)")
+        return queued
+    
     def _generate_blog(self, theme: str, trends: Dict) -> Dict:
-        """Generate complete blog post"""
+        """Generate complete blog post (streamed)"""
+        blog = self._stream_blog(theme)
+        if not blog:
+            return self._fallback_blog(theme)
+        
+        print(f"   ✅ Generated {len(blog['html_content'])} chars")
+        return blog
+    
+    def _stream_blog(self, theme: str) -> Optional[Dict]:
+        """
+        Stream and parse one blog post; None if the model didn't deliver.
+        A reply with no Title: header in its opening is abandoned early
+        (refusal or off-format) rather than streamed to the end.
+        """
         
         prompt = f"""
 Write a complete SEO blog post about: {theme}
@@ -502,30 +861,22 @@ Tags: tag1, tag2, tag3
 [Full HTML content with <h2>, <h3>, <p>, <ul>, <strong> tags]
 """
         
-        content = self.ai.generate(prompt)
-        
-        if not content or len(content) < 200:
-            return self._fallback_blog(theme)
-        
-        # Parse content
-        lines = content.split('\n')
-        blog = {
-            'title': '',
-            'meta_description': '',
-            'tags': [],
-            'html_content': ''
-        }
+        # Headers are parsed as soon as their line arrives
+        parser = StreamingBlogParser()
+        try:
+            for chunk in self.ai.generate_stream(prompt, cache_if=lambda text: len(text) >= self.MIN_BLOG_CHARS):
+                parser.feed(chunk)
+                if parser.length >= self.HEADER_CHARS and 'title:' not in ''.join(parser.chunks).lower():
+                    print(f"   ⚠️ No Title: header after {parser.length} chars - abandoning stream")
+                    return None
+        except Exception as e:
+            print(f"   ⚠️ Stream interrupted after {parser.length} chars: {str(e)[:50]}")
+            return None
         
-        for line in lines:
-            if line.startswith('Title:'):
-                blog['title'] = line.replace('Title:', '').strip()
-            elif line.startswith('Meta:'):
-                blog['meta_description'] = line.replace('Meta:', '').strip()
-            elif line.startswith('Tags:'):
-                blog['tags'] = [t.strip() for t in line.replace('Tags:', '').split(',')]
+        blog = parser.close()
         
-        # Get HTML content (everything after tags)
-        blog['html_content'] = '\n'.join(lines).strip()
+        if parser.length < self.MIN_BLOG_CHARS:
+            return None
         
         # Ensure required fields
         if not blog['title']:
@@ -535,7 +886,6 @@ Tags: tag1, tag2, tag3
         if not blog['tags']:
             blog['tags'] = ['voice-gifts', 'personalized', 'uk-gifts']
         
-        print(f"   ✅ Generated {len(blog['html_content'])} chars")
         return blog
     
     def _fallback_blog(self, theme: str) -> Dict:
@@ -571,8 +921,27 @@ Tags: tag1, tag2, tag3
             'tags': ['voice-gifts', 'personalized', 'uk-gifts']
         }
     
-    def _generate_social_posts(self, blog: Dict) -> Dict:
-        """Generate social media posts"""
+    def _social_hashtags(self, base: List[str], tiktok: List[Dict], total: int) -> str:
+        """Brand tags first, then the fastest-growing tracked TikTok tags"""
+        tags = list(base)
+        seen = {t.lower() for t in tags}
+        for tag in TikTokHashtagTracker.rank(tiktok, limit=total):
+            if len(tags) >= total:
+                break
+            if tag.lower() not in seen:
+                seen.add(tag.lower())
+                tags.append(tag)
+        return ' '.join(tags)
+    
+    def _generate_social_posts(self, blog: Dict, tiktok: Optional[List[Dict]] = None) -> Dict:
+        """Generate social media posts (hashtags picked from live TikTok metrics when available)"""
+        
+        if TikTokHashtagTracker.rank(tiktok or []):
+            fb_tags = self._social_hashtags(['#SayPlay', '#VoiceMessage'], tiktok, 5)
+            ig_tags = self._social_hashtags(['#SayPlay', '#VoiceMessage', '#UKGifts'], tiktok, 9)
+        else:
+            fb_tags = "#SayPlay #PersonalizedGifts #VoiceMessage #GiftIdeas #UKGifts"
+            ig_tags = "#SayPlay #PersonalizedGifts #VoiceMessage #GiftIdeas #UKGifts #CreativeGifts #UniqueGifts #Wedding #Birthday"
         
         # Facebook post (longer)
         fb_post = f"""🎁 {blog['title']}
@@ -585,7 +954,7 @@ Tags: tag1, tag2, tag3
 
 From £8.99 → Shop now: https://sayplay.co.uk
 
-#SayPlay #PersonalizedGifts #VoiceMessage #GiftIdeas #UKGifts"""
+{fb_tags}"""
         
         # Instagram caption (with emojis)
         ig_post = f"""🎁✨ {blog['title'].split('|')[0].strip()}
@@ -599,7 +968,7 @@ From £8.99 🛍️
 Shop: sayplay.co.uk
 (Link in bio!)
 
-#SayPlay #PersonalizedGifts #VoiceMessage #GiftIdeas #UKGifts #CreativeGifts #UniqueGifts #Wedding #Birthday"""
+{ig_tags}"""
         
         return {
             'facebook': fb_post,
@@ -615,7 +984,9 @@ class ImageGenerator:
     """Generate professional product images"""
     
     def __init__(self):
-        pass
+        self.http = get_http_client()
+        self.assets = get_asset_store()
+        self.fallback = get_fallback_renderer()
     
     def generate(self, theme: str) -> str:
         """Generate image with Pollinations.ai"""
@@ -643,12 +1014,11 @@ no logo
             seed = random.randint(1, 99999)
             url = f"https://image.pollinations.ai/prompt/{encoded}?width=1080&height=1080&nologo=true&seed={seed}"
             
-            response = requests.get(url, timeout=60)
+            # Idempotent GET with no deadline: worth retrying on 429/5xx
+            response = self.http.get(url, timeout=60, retry=True)
             
             if response.status_code == 200:
-                filename = f'sayplay_post_{int(time.time())}.jpg'
-                with open(filename, 'wb') as f:
-                    f.write(response.content)
+                filename = self.assets.put_bytes(response.content, source='sayplay_post')
                 print(f"   ✅ Generated: {filename}")
                 return filename
         except Exception as e:
@@ -658,31 +1028,8 @@ no logo
     
     def _create_fallback_image(self) -> str:
         """Create branded fallback"""
-        img = Image.new('RGB', (1080, 1080))
-        draw = ImageDraw.Draw(img)
-        
-        # SayPlay gradient
-        for y in range(1080):
-            ratio = y / 1080
-            r = int(255 + (255 - 255) * ratio)
-            g = int(140 + (107 - 140) * ratio)
-            b = int(66 + (53 - 66) * ratio)
-            draw.rectangle([(0, y), (1080, y+1)], fill=(r, g, b))
-        
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 80)
-        except:
-            font = None
-        
-        text = "SayPlay"
-        if font:
-            bbox = draw.textbbox((0, 0), text, font=font)
-            x = (1080 - (bbox[2] - bbox[0])) // 2
-            y = (1080 - (bbox[3] - bbox[1])) // 2
-            draw.text((x, y), text, fill='white', font=font)
-        
-        filename = f'sayplay_fallback_{int(time.time())}.jpg'
-        img.save(filename, 'JPEG', quality=95)
+        data = self.fallback.render()
+        filename = self.assets.put_bytes(data, source='sayplay_fallback')
         print(f"   ✅ Created fallback: {filename}")
         return filename
 
@@ -699,6 +1046,13 @@ class CompletePublisher:
     ✅ LinkedIn (optional)
     """
     
+    # Per-platform publish deadlines (seconds)
+    PLATFORM_DEADLINES = {
+        'shopify': 45,
+        'facebook': 60,
+        'instagram': 90
+    }
+    
     def __init__(self):
         # Shopify
         self.shopify_shop = os.getenv('SHOPIFY_SHOP')  # e.g., 'sayplay.myshopify.com'
@@ -713,27 +1067,112 @@ class CompletePublisher:
         self.ig_business_id = os.getenv('INSTAGRAM_BUSINESS_ID')
         self.ig_token = os.getenv('INSTAGRAM_ACCESS_TOKEN')
         
+        self.http = get_http_client()
+        self._responses = {}
+        self._late = {}
+        
         print("✅ Publisher initialized")
         print(f"   Shopify: {'✅' if self.shopify_shop else '❌ Not configured'}")
         print(f"   Facebook: {'✅' if self.fb_page_token else '❌ Not configured'}")
         print(f"   Instagram: {'✅' if self.ig_business_id else '❌ Not configured'}")
     
-    def publish_all(self, content: Dict, image_path: str) -> Dict:
-        """Publish to all platforms"""
+    def _configured(self, platform: str) -> bool:
+        return {
+            'shopify': bool(self.shopify_shop and self.shopify_token),
+            'facebook': bool(self.fb_page_token and self.fb_page_id),
+            'instagram': bool(self.ig_business_id and self.ig_token)
+        }.get(platform, False)
+    
+    def _record(self, platform: str, status_code: Optional[int], post_id: Optional[str] = None,
+                status: Optional[str] = None):
+        """Remember the raw API outcome for publish_all's structured results"""
+        self._responses[platform] = {'status_code': status_code, 'id': post_id, 'status': status}
+    
+    def _publish_one(self, platform: str, job: Callable[[], Optional[str]]) -> Dict:
+        started = time.time()
+        self._responses.pop(platform, None)
+        try:
+            url = job()
+            status = 'published' if url else 'failed'
+        except Exception as e:
+            url = None
+            status = 'error'
+            print(f"   ❌ {platform} error: {str(e)[:100]}")
+        
+        response = self._responses.get(platform, {})
+        return {
+            'status': response.get('status') or status,
+            'url': url,
+            'id': response.get('id'),
+            'status_code': response.get('status_code'),
+            'latency': round(time.time() - started, 2)
+        }
+    
+    def publish_all(self, content: Dict, image_path: Optional[str] = None,
+                    platforms: Optional[List[str]] = None) -> Dict:
+        """
+        Publish to every configured platform (or just `platforms`) at once.
+        Each platform has its own deadline; a hung platform is reported as
+        'timeout' and never blocks the others. It keeps running, though -
+        settle() collects its real outcome later.
+        """
+        jobs = {
+            'shopify': lambda: self.publish_shopify(content['blog']),
+            'facebook': lambda: self.publish_facebook(content['social']['facebook'], image_path),
+            'instagram': lambda: self.publish_instagram(content['social']['instagram'], image_path)
+        }
+        if platforms is not None:
+            jobs = {name: job for name, job in jobs.items() if name in platforms}
         
         results = {}
+        for platform in list(jobs):
+            if not self._configured(platform):
+                jobs.pop(platform)
+                results[platform] = {'status': 'not_configured', 'url': None, 'id': None,
+                                     'status_code': None, 'latency': 0.0}
         
-        # 1. Shopify Blog
-        results['shopify'] = self.publish_shopify(content['blog'])
+        if not jobs:
+            return results
         
-        # 2. Facebook
-        results['facebook'] = self.publish_facebook(content['social']['facebook'], image_path)
+        executor = ThreadPoolExecutor(max_workers=len(jobs))
+        started = time.time()
+        futures = {name: executor.submit(self._publish_one, name, job) for name, job in jobs.items()}
         
-        # 3. Instagram
-        results['instagram'] = self.publish_instagram(content['social']['instagram'], image_path)
+        for platform, future in futures.items():
+            deadline = self.PLATFORM_DEADLINES.get(platform, 60)
+            remaining = max(deadline - (time.time() - started), 0)
+            try:
+                results[platform] = future.result(timeout=remaining)
+            except FutureTimeout:
+                print(f"   ⏰ {platform} publish timed out after {deadline}s")
+                results[platform] = {'status': 'timeout', 'url': None, 'id': None,
+                                     'status_code': None, 'latency': round(time.time() - started, 2)}
+                self._late[platform] = future
+        
+        executor.shutdown(wait=False, cancel_futures=True)
+        
+        for platform, result in results.items():
+            print(f"   📊 {platform}: {result['status']} ({result['latency']}s)")
         
         return results
     
+    def settle(self, results: Dict) -> Dict:
+        """
+        Final outcome of every platform: waits for the ones that timed out
+        (their request is already in flight and the process would wait for
+        it on exit anyway), so a late success isn't recorded as a failure.
+        """
+        settled = dict(results)
+        for platform, future in list(self._late.items()):
+            if platform in settled:
+                try:
+                    settled[platform] = dict(future.result(), late=True)
+                except Exception:
+                    pass
+                self._late.pop(platform)
+                print(f"   📊 {platform} (late): {settled[platform]['status']}")
+        return settled
+    
     def publish_shopify(self, blog: Dict) -> Optional[str]:
         """Publish article to Shopify Blog"""
         print("\n" + "=" * 80)
@@ -765,14 +1204,16 @@ class CompletePublisher:
             
             print(f"   📝 Publishing: {blog['title'][:60]}...")
             
-            response = requests.post(url, headers=headers, json=data, timeout=30)
+            response = self.http.post(url, headers=headers, json=data, timeout=30)
             
             if response.status_code == 201:
                 article_id = response.json()['article']['id']
+                self._record('shopify', response.status_code, str(article_id))
                 article_url = f"https://sayplay.co.uk/blogs/news/{article_id}"
                 print(f"   ✅ Published! URL: {article_url}")
                 return article_url
             else:
+                self._record('shopify', response.status_code)
                 print(f"   ❌ Failed: {response.status_code} - {response.text[:100]}")
                 return None
                 
@@ -803,14 +1244,16 @@ class CompletePublisher:
                 }
                 
                 print(f"   📸 Uploading image...")
-                response = requests.post(photo_url, files=files, data=data, timeout=30)
+                response = self.http.post(photo_url, files=files, data=data, timeout=30)
             
             if response.status_code == 200:
                 post_id = response.json()['id']
+                self._record('facebook', response.status_code, post_id)
                 post_url = f"https://facebook.com/{post_id}"
                 print(f"   ✅ Posted! ID: {post_id}")
                 return post_url
             else:
+                self._record('facebook', response.status_code)
                 print(f"   ❌ Failed: {response.status_code} - {response.text[:100]}")
                 return None
                 
@@ -828,82 +1271,228 @@ class CompletePublisher:
             print("   ⚠️ Instagram not configured")
             return None
         
+        if not image_path:
+            print("   ⚠️ Instagram needs an image - skipping")
+            self._record('instagram', None, status='no_image')
+            return None
+        
         try:
+            # Instagram fetches the image itself, so it needs a public URL
+            # (uploaded once per image, shared with any other publisher)
+            image_url = get_asset_host().public_url(image_path)
+            print(f"   ✅ Image hosted: {image_url}")
+            
+            if len(caption) > 2200:
+                caption = caption[:2180] + "... 🎁"
+            
             # Step 1: Create media container
             container_url = f"https://graph.facebook.com/v18.0/{self.ig_business_id}/media"
+            data = {
+                'image_url': image_url,
+                'caption': caption,
+                'access_token': self.ig_token
+            }
             
-            # First upload image to a publicly accessible URL (use imgur or similar)
-            # For now, we'll use local file (requires FB to access it)
-            # In production, upload to imgur/cloudinary first
+            print(f"   📦 Creating container...")
+            response = self.http.post(container_url, data=data, timeout=30)
+            if response.status_code != 200:
+                self._record('instagram', response.status_code)
+                print(f"   ❌ Container failed: {response.status_code} - {response.text[:100]}")
+                return None
+            container_id = response.json()['id']
             
-            print("   ⚠️ Instagram requires public image URL")
-            print("   💡 Upload image to Imgur/Cloudinary first, then use that URL")
-            print("   ℹ️ Skipping Instagram (needs public URL)")
-            return None
+            # Step 2: Publish as soon as Instagram has processed it
+            print(f"   ⏳ Waiting for container processing...")
+            status = self._wait_for_container(container_id)
+            if status != 'FINISHED':
+                self._record('instagram', None, status=f'container_{status.lower()}')
+                print(f"   ❌ Container not ready: {status}")
+                return None
             
-            # Full implementation would be:
-            # 1. Upload image to imgur.com (free API)
-            # 2. Get public URL
-            # 3. Create IG container with that URL
-            # 4. Publish container
+            publish_url = f"https://graph.facebook.com/v18.0/{self.ig_business_id}/media_publish"
+            data = {
+                'creation_id': container_id,
+                'access_token': self.ig_token
+            }
+            
+            print(f"   🚀 Publishing...")
+            response = self.http.post(publish_url, data=data, timeout=30)
+            if response.status_code != 200:
+                self._record('instagram', response.status_code)
+                print(f"   ❌ Failed: {response.status_code} - {response.text[:100]}")
+                return None
+            
+            media_id = response.json()['id']
+            self._record('instagram', response.status_code, media_id)
+            post_url = self._instagram_permalink(media_id)
+            print(f"   ✅ Posted! ID: {media_id}")
+            return post_url
             
         except Exception as e:
             print(f"   ❌ Error: {str(e)[:100]}")
             return None
+    
+    def _container_status(self, container_id: str) -> str:
+        response = self.http.get(
+            f"https://graph.facebook.com/v18.0/{container_id}",
+            params={'fields': 'status_code', 'access_token': self.ig_token},
+            timeout=15
+        )
+        if response.status_code != 200:
+            return 'UNKNOWN'
+        return response.json().get('status_code', 'UNKNOWN')
+    
+    def _wait_for_container(self, container_id: str, timeout: float = 60,
+                            first_delay: float = 1.0, max_delay: float = 10.0) -> str:
+        """
+        Poll a media container until it is FINISHED (or ERROR/EXPIRED),
+        backing off 1s → 1.5s → 2.25s ... up to max_delay. The default
+        timeout leaves room for publishing inside the 90s platform deadline.
+        """
+        started = time.time()
+        delay = first_delay
+        while True:
+            try:
+                status = self._container_status(container_id)
+            except Exception as e:
+                print(f"   ⚠️ Status check failed: {str(e)[:100]}")
+                status = 'UNKNOWN'
+            
+            if status in ('FINISHED', 'ERROR', 'EXPIRED'):
+                print(f"   ✅ Container {container_id}: {status} after {time.time() - started:.1f}s")
+                return status
+            
+            if time.time() - started + delay > timeout:
+                print(f"   ⏰ Container {container_id} still {status} after {timeout}s")
+                return 'TIMEOUT'
+            time.sleep(delay)
+            delay = min(delay * 1.5, max_delay)
+    
+    def _instagram_permalink(self, media_id: str) -> str:
+        """Public post URL; falls back to the media ID if the lookup fails"""
+        try:
+            response = self.http.get(
+                f"https://graph.facebook.com/v18.0/{media_id}",
+                params={'fields': 'permalink', 'access_token': self.ig_token},
+                timeout=15
+            )
+            if response.status_code == 200 and response.json().get('permalink'):
+                return response.json()['permalink']
+        except Exception:
+            pass
+        return media_id
 
 # ============================================================================
 # CONTENT HISTORY
 # ============================================================================
 
 class ContentHistory:
-    """Track published content"""
+    """Track published content (indexed SQLite store, full history)"""
     
     def __init__(self, file: str = 'content_history.json'):
         self.file = file
-        self.history = self._load()
-    
-    def _load(self) -> List[Dict]:
-        if os.path.exists(self.file):
-            try:
-                with open(self.file, 'r') as f:
-                    data = json.load(f)
-                
-                # Migrate old entries
-                migrated = []
-                for entry in data:
-                    if 'theme' not in entry:
-                        entry['theme'] = entry.get('title', '').split('|')[0].strip()
-                    migrated.append(entry)
-                
-                return migrated
-            except:
-                return []
-        return []
+        self.store = HistoryStore(legacy_json=file)
     
     def save(self, entry: Dict):
-        self.history.append({
-            'date': datetime.now().isoformat(),
+        self.store.append({
             'title': entry.get('title', ''),
             'theme': entry.get('theme', ''),
             'platforms': entry.get('platforms', [])
         })
-        
-        # Keep 30 days
-        cutoff = datetime.now() - timedelta(days=30)
-        self.history = [
-            h for h in self.history
-            if datetime.fromisoformat(h['date']) > cutoff
-        ]
-        
-        with open(self.file, 'w') as f:
-            json.dump(self.history, f, indent=2)
     
     def get_recent_themes(self, days: int = 7) -> List[str]:
-        cutoff = datetime.now() - timedelta(days=days)
-        return [
-            h.get('theme', '') for h in self.history
-            if datetime.fromisoformat(h['date']) > cutoff and h.get('theme')
-        ]
+        return self.store.themes_since(datetime.now() - timedelta(days=days))
+
+# ============================================================================
+# PIPELINE DAG SCHEDULER
+# ============================================================================
+
+class PipelineDAG:
+    """
+    Tiny DAG executor: each stage declares the names it reads (inputs)
+    and writes (outputs). Stages whose inputs are ready run concurrently.
+    """
+    
+    def __init__(self, max_workers: int = 4):
+        self.max_workers = max_workers
+        self.stages = {}
+        self.producers = {}
+        self.timings = {}
+        self.started = 0.0
+        self.finished = 0.0
+    
+    def add(self, name: str, fn: Callable, inputs: List[str] = None, outputs: List[str] = None):
+        """fn(**inputs) returns the value for a single output, else a dict of outputs"""
+        self.stages[name] = {'fn': fn, 'inputs': inputs or [], 'outputs': outputs or []}
+        for output in outputs or []:
+            self.producers[output] = name
+    
+    def _deps(self, name: str) -> List[str]:
+        return [self.producers[i] for i in self.stages[name]['inputs'] if i in self.producers]
+    
+    def _run_stage(self, name: str, context: Dict) -> Dict:
+        stage = self.stages[name]
+        started = time.time()
+        try:
+            result = stage['fn'](**{i: context.get(i) for i in stage['inputs']})
+        finally:
+            self.timings[name] = {'start': started, 'end': time.time()}
+        
+        if len(stage['outputs']) == 1:
+            return {stage['outputs'][0]: result}
+        return result or {}
+    
+    def run(self, context: Optional[Dict] = None) -> Dict:
+        context = dict(context or {})
+        done = set()
+        running = {}
+        self.started = time.time()
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while len(done) < len(self.stages):
+                for name in self.stages:
+                    if name in done or name in running.values():
+                        continue
+                    if all(dep in done for dep in self._deps(name)):
+                        running[executor.submit(self._run_stage, name, context)] = name
+                
+                if not running:
+                    raise RuntimeError("Pipeline has unsatisfiable inputs")
+                
+                finished, _ = wait(list(running), return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    outputs = future.result()
+                    for key in self.stages[name]['outputs']:
+                        context[key] = outputs.get(key)
+                    done.add(name)
+        
+        self.finished = time.time()
+        return context
+    
+    def critical_path(self) -> List[str]:
+        """Chain of stages that determined the total run time"""
+        if not self.timings:
+            return []
+        path = [max(self.timings, key=lambda n: self.timings[n]['end'])]
+        while True:
+            deps = self._deps(path[-1])
+            if not deps:
+                break
+            path.append(max(deps, key=lambda n: self.timings[n]['end']))
+        return list(reversed(path))
+    
+    def print_report(self):
+        print("\n⏱️ PIPELINE TIMING")
+        for name, t in sorted(self.timings.items(), key=lambda item: item[1]['start']):
+            offset = t['start'] - self.started
+            print(f"   {name:<20} +{offset:6.1f}s  {t['end'] - t['start']:6.1f}s")
+        
+        path = self.critical_path()
+        total = self.finished - self.started
+        serial = sum(t['end'] - t['start'] for t in self.timings.values())
+        print(f"   Critical path: {' → '.join(path)}")
+        print(f"   Wall clock: {total:.1f}s (serial would be {serial:.1f}s)")
 
 # ============================================================================
 # MAIN ORCHESTRATOR
@@ -924,36 +1513,62 @@ def main():
         # Initialize systems
         print("\n🔧 Initializing systems...")
         ai = AIOrchestrator()
-        research = CompleteTrendResearch(ai)
-        content_gen = ContentGenerator(ai)
+        drafts = DraftQueue()
+        research = CompleteTrendResearch(ai, drafts)
+        content_gen = ContentGenerator(ai, drafts)
         image_gen = ImageGenerator()
         publisher = CompletePublisher()
         history = ContentHistory()
         
         # Step 1: Research trends
-        trends = research.research_all_trends()
-        with open('research_data.json', 'w') as f:
-            json.dump(trends, f, indent=2)
-        print("\n💾 Research saved to research_data.json")
+        def research_step():
+            trends = research.research_all_trends()
+            with open('research_data.json', 'w') as f:
+                json.dump(trends, f, indent=2)
+            print("\n💾 Research saved to research_data.json")
+            return trends
         
         # Step 2: Generate content
-        content = content_gen.generate_complete_campaign(trends)
-        with open('generated_content.json', 'w') as f:
-            json.dump(content, f, indent=2)
-        print("💾 Content saved to generated_content.json")
-        
-        # Step 3: Generate image
-        image_path = image_gen.generate(content['theme'])
-        
-        # Step 4-6: Publish everywhere
-        results = publisher.publish_all(content, image_path)
-        
-        # Save history
-        history.save({
-            'title': content['blog']['title'],
-            'theme': content['theme'],
-            'platforms': [k for k, v in results.items() if v]
-        })
+        def content_step(trends, theme):
+            content = content_gen.generate_complete_campaign(trends, theme=theme)
+            with open('generated_content.json', 'w') as f:
+                json.dump(content, f, indent=2)
+            print("💾 Content saved to generated_content.json")
+            return content
+        
+        # Save history once every publish has finished (late ones included)
+        def history_step(content, shopify_results, social_results):
+            results = publisher.settle({**(shopify_results or {}), **(social_results or {})})
+            history.save({
+                'title': content['blog']['title'],
+                'theme': content['theme'],
+                'platforms': [k for k, v in results.items() if v['status'] == 'published']
+            })
+            return results
+        
+        # Image only needs the theme, so it overlaps blog generation;
+        # Shopify publishes as soon as the blog exists, the image-based
+        # platforms fan out in parallel once the image is ready; spare
+        # themes are drafted for future runs alongside everything else
+        pipeline = PipelineDAG()
+        pipeline.add('research', research_step, outputs=['trends'])
+        pipeline.add('theme', content_gen.select_theme, inputs=['trends'], outputs=['theme'])
+        pipeline.add('content', content_step, inputs=['trends', 'theme'], outputs=['content'])
+        pipeline.add('image', image_gen.generate, inputs=['theme'], outputs=['image_path'])
+        pipeline.add('publish_shopify', lambda content: publisher.publish_all(content, platforms=['shopify']),
+                     inputs=['content'], outputs=['shopify_results'])
+        pipeline.add('publish_social',
+                     lambda content, image_path: publisher.publish_all(content, image_path,
+                                                                       platforms=['facebook', 'instagram']),
+                     inputs=['content', 'image_path'], outputs=['social_results'])
+        pipeline.add('history', history_step, inputs=['content', 'shopify_results', 'social_results'],
+                     outputs=['results'])
+        pipeline.add('drafts', content_gen.prefill_drafts, inputs=['trends', 'theme'], outputs=['queued'])
+        
+        ctx = pipeline.run()
+        content = ctx['content']
+        image_path = ctx['image_path']
+        statuses = {k: v['status'] for k, v in ctx['results'].items()}
         
         # Summary
         print("\n" + "=" * 80)
@@ -961,12 +1576,17 @@ def main():
         print("=" * 80)
         print(f"📝 Blog: {content['blog']['title']}")
         print(f"📸 Image: {image_path}")
-        print(f"🛒 Shopify: {'✅ Published' if results.get('shopify') else '❌ Failed'}")
-        print(f"📘 Facebook: {'✅ Posted' if results.get('facebook') else '❌ Failed'}")
-        print(f"📷 Instagram: {'✅ Posted' if results.get('instagram') else '⚠️ Needs setup'}")
+        print(f"🛒 Shopify: {'✅ Published' if statuses.get('shopify') == 'published' else '❌ Failed'}")
+        print(f"📘 Facebook: {'✅ Posted' if statuses.get('facebook') == 'published' else '❌ Failed'}")
+        print(f"📷 Instagram: {'✅ Posted' if statuses.get('instagram') == 'published' else '⚠️ Needs setup' if statuses.get('instagram') in ('no_image', 'not_configured') else '❌ Failed'}")
         print(f"🤖 Model: {ai.active_model}")
+        budget = ai.remaining_budget()
+        print(f"📊 Gemini today: {budget['requests_today']} requests, ~{budget['tokens_today']} tokens "
+              f"({budget['requests_remaining']} requests left)")
         print(f"💰 Cost: $0")
         print("=" * 80)
+        pipeline.print_report()
+        get_http_client().print_metrics()
         
         return 0
         
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY PROMPT CONTEXT BUILDER
+==============================
+
+Packs research items into a prompt under a token budget.
+
+- Scores normalised per source (rank-based), so likes, velocities and
+  interest points can be compared
+- Recency: dated items fade with a half-life
+- Diversity: every extra item from an already-used source is discounted
+- Near-identical items (same core words) are kept once
+- Token cost estimated locally (sayplay_quota.estimate_tokens)
+"""
+
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Union
+
+from sayplay_novelty import tokenize
+from sayplay_quota import estimate_tokens
+
+# ============================================================================
+# CONTEXT BUILDER
+# ============================================================================
+
+class ContextBuilder:
+    """Greedy, diversity-aware packing of scored items into a token budget"""
+
+    DUPLICATE = 0.7          # Jaccard overlap of core words
+    SOURCE_DECAY = 0.75      # weight multiplier per item already taken from a source
+
+    def __init__(self, budget_tokens: int = 600, half_life_days: float = 7):
+        self.budget_tokens = budget_tokens
+        self.half_life_days = half_life_days
+        self.items: List[Dict] = []
+        self.report: Dict = {}
+
+    def add(self, source: str, text: str, score: float = 0.0,
+            when: Optional[Union[str, float, datetime]] = None):
+        text = ' '.join(str(text).split())
+        if text:
+            self.items.append({'source': source, 'text': text, 'score': float(score or 0), 'when': when})
+
+    def _age_days(self, when) -> Optional[float]:
+        try:
+            if isinstance(when, (int, float)):
+                moment = datetime.fromtimestamp(when, tz=timezone.utc)
+            elif isinstance(when, datetime):
+                moment = when
+            else:
+                moment = datetime.fromisoformat(str(when).replace('Z', '+00:00'))
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+        except (TypeError, ValueError, OverflowError, OSError):
+            return None
+        return max((datetime.now(timezone.utc) - moment).total_seconds() / 86400, 0)
+
+    def _base_values(self) -> List[float]:
+        """Rank-normalised score (1.0 = best in its source) x recency"""
+        by_source = {}
+        for i, item in enumerate(self.items):
+            by_source.setdefault(item['source'], []).append(i)
+
+        values = [0.0] * len(self.items)
+        for indices in by_source.values():
+            ranked = sorted(indices, key=lambda i: self.items[i]['score'], reverse=True)
+            for rank, i in enumerate(ranked):
+                value = 1 - rank / len(ranked) * 0.9
+                age = self._age_days(self.items[i]['when']) if self.items[i]['when'] is not None else None
+                if age is not None:
+                    value *= 0.5 ** (age / self.half_life_days)
+                values[i] = value
+        return values
+
+    def build(self) -> str:
+        """Prompt lines ('Source: text'), best first, within the budget"""
+        values = self._base_values()
+        remaining = list(range(len(self.items)))
+        taken_per_source: Dict[str, int] = {}
+        chosen, kept_terms = [], []
+        used, duplicates = 0, 0
+
+        while remaining:
+            # Re-score with the diversity discount for what's been taken so far
+            best = max(
+                remaining,
+                key=lambda i: values[i] * self.SOURCE_DECAY ** taken_per_source.get(self.items[i]['source'], 0)
+            )
+            remaining.remove(best)
+            item = self.items[best]
+
+            terms = set(tokenize(item['text']))
+            if terms and any(len(terms & other) / len(terms | other) >= self.DUPLICATE for other in kept_terms):
+                duplicates += 1
+                continue
+
+            line = f"{item['source']}: {item['text']}"
+            cost = estimate_tokens(line + '\n')
+            if used + cost > self.budget_tokens:
+                continue  # A shorter item may still fit
+
+            chosen.append(line)
+            kept_terms.append(terms)
+            used += cost
+            taken_per_source[item['source']] = taken_per_source.get(item['source'], 0) + 1
+
+        self.report = {
+            'candidates': len(self.items),
+            'selected': len(chosen),
+            'duplicates': duplicates,
+            'tokens': used,
+            'budget': self.budget_tokens,
+            'sources': taken_per_source
+        }
+        return '\n'.join(chosen)
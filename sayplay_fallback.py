@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY BRANDED FALLBACK IMAGES
+===============================
+
+Renders the orange SayPlay gradient used whenever image generation fails.
+
+- Gradient built in one pass (Pillow linear_gradient + per-channel LUT)
+  instead of one draw.rectangle per row
+- TrueType fonts loaded once per size
+- Base layer and JPEG output memoized per (size, text, palette)
+- Themed variants draw a title overlay on a copy of the cached base
+"""
+
+import threading
+from io import BytesIO
+from typing import Dict, Optional, Tuple
+
+from PIL import Image, ImageDraw, ImageFont
+
+BRAND_PALETTE = ((255, 140, 66), (255, 107, 53))
+FONT_PATH = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+
+# ============================================================================
+# RENDERER
+# ============================================================================
+
+class FallbackRenderer:
+    """Memoized renderer for branded fallback images"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fonts: Dict[int, ImageFont.ImageFont] = {}
+        self._bases: Dict[Tuple, Image.Image] = {}
+        self._renders: Dict[Tuple, bytes] = {}
+
+    def _font(self, size: int) -> ImageFont.ImageFont:
+        if size not in self._fonts:
+            try:
+                self._fonts[size] = ImageFont.truetype(FONT_PATH, size)
+            except:
+                self._fonts[size] = ImageFont.load_default()
+        return self._fonts[size]
+
+    def _gradient(self, size: Tuple[int, int], palette: Tuple) -> Image.Image:
+        """Vertical gradient from palette[0] (top) to palette[1] (bottom)"""
+        top, bottom = palette
+        ramp = Image.linear_gradient('L').resize(size, Image.BILINEAR)
+        channels = []
+        for c in range(3):
+            lut = [int(top[c] + (bottom[c] - top[c]) * v / 255) for v in range(256)]
+            channels.append(ramp.point(lut))
+        return Image.merge('RGB', channels)
+
+    def _base(self, size: Tuple[int, int], text: str, palette: Tuple) -> Image.Image:
+        key = (size, text, palette)
+        if key not in self._bases:
+            img = self._gradient(size, palette)
+            draw = ImageDraw.Draw(img)
+            font = self._font(max(size[1] * 2 // 27, 10))
+            bbox = draw.textbbox((0, 0), text, font=font)
+            x = (size[0] - (bbox[2] - bbox[0])) // 2
+            y = (size[1] - (bbox[3] - bbox[1])) // 2
+            draw.text((x, y), text, fill='white', font=font)
+            self._bases[key] = img
+        return self._bases[key]
+
+    def _draw_overlay(self, img: Image.Image, overlay: str):
+        """Theme title, word-wrapped, in the lower third"""
+        draw = ImageDraw.Draw(img)
+        width, height = img.size
+        font = self._font(max(height // 27, 10))
+
+        lines, line = [], ''
+        for word in overlay.split():
+            candidate = f"{line} {word}".strip()
+            if draw.textlength(candidate, font=font) > width * 0.85 and line:
+                lines.append(line)
+                line = word
+            else:
+                line = candidate
+        if line:
+            lines.append(line)
+
+        line_height = int(font.size * 1.3) if hasattr(font, 'size') else 14
+        y = int(height * 0.68)
+        for text_line in lines[:3]:
+            x = (width - draw.textlength(text_line, font=font)) // 2
+            draw.text((x, y), text_line, fill='white', font=font)
+            y += line_height
+
+    def render(self, size: Tuple[int, int] = (1080, 1080), text: str = 'SayPlay',
+               palette: Tuple = BRAND_PALETTE, overlay: Optional[str] = None) -> bytes:
+        """JPEG bytes for the fallback image (memoized)"""
+        key = (size, text, palette, overlay)
+        with self._lock:
+            if key not in self._renders:
+                img = self._base(size, text, palette)
+                if overlay:
+                    img = img.copy()
+                    self._draw_overlay(img, overlay)
+                buffer = BytesIO()
+                img.save(buffer, 'JPEG', quality=95)
+                self._renders[key] = buffer.getvalue()
+            return self._renders[key]
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+def get_fallback_renderer() -> FallbackRenderer:
+    """Process-wide shared renderer (keeps its caches between calls)"""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = FallbackRenderer()
+        return _renderer
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY RSS FEED CACHE
+======================
+
+Conditional-GET feed reader for the research engine.
+
+- ETag / Last-Modified remembered per feed; unchanged feeds answer
+  304 Not Modified and cost no body download or parsing
+- Parsed entries kept on disk (cache/feed_cache.json), capped per feed
+- All feeds fetched concurrently through the shared HTTP pool
+- Only entries not seen on a previous run are surfaced
+"""
+
+import os
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List
+
+import feedparser
+
+from sayplay_http import get_http_client
+
+FEED_CACHE_FILE = os.path.join('cache', 'feed_cache.json')
+
+# ============================================================================
+# FEED CACHE
+# ============================================================================
+
+class FeedCache:
+    """Per-feed validators + seen entries, persisted as JSON"""
+
+    def __init__(self, path: str = FEED_CACHE_FILE, max_entries: int = 50,
+                 max_workers: int = 8, timeout: int = 15):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self.http = get_http_client()
+        self._lock = threading.Lock()
+        self.feeds = self._load()
+        self.stats = {'not_modified': 0, 'fetched': 0, 'failed': 0}
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except:
+                pass
+        return {}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_file = self.path + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(self.feeds, f, indent=2)
+            os.replace(tmp_file, self.path)
+        except Exception as e:
+            print(f"   ⚠️ Could not save feed cache: {str(e)[:50]}")
+
+    @staticmethod
+    def _entry_id(entry) -> str:
+        return entry.get('id') or entry.get('link') or entry.get('title', '')
+
+    def fetch(self, name: str, url: str) -> List[Dict]:
+        """Entries of one feed that weren't there last run"""
+        with self._lock:
+            state = dict(self.feeds.get(name, {}))
+
+        headers = {}
+        if state.get('url') == url:
+            if state.get('etag'):
+                headers['If-None-Match'] = state['etag']
+            if state.get('last_modified'):
+                headers['If-Modified-Since'] = state['last_modified']
+
+        response = self.http.get(url, headers=headers, timeout=self.timeout)
+        if response.status_code == 304:
+            with self._lock:
+                self.stats['not_modified'] += 1
+                self.feeds[name]['checked'] = datetime.now().isoformat()
+            return []
+        response.raise_for_status()
+
+        feed = feedparser.parse(response.content)
+        known = {e['id'] for e in state.get('entries', [])} if state.get('url') == url else set()
+        new_entries = []
+        for entry in feed.entries:
+            entry_id = self._entry_id(entry)
+            if not entry_id or entry_id in known:
+                continue
+            known.add(entry_id)
+            new_entries.append({
+                'id': entry_id,
+                'title': entry.get('title', ''),
+                'link': entry.get('link', ''),
+                'published': entry.get('published', '')
+            })
+
+        previous = state.get('entries', []) if state.get('url') == url else []
+        with self._lock:
+            self.stats['fetched'] += 1
+            self.feeds[name] = {
+                'url': url,
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+                'checked': datetime.now().isoformat(),
+                'entries': (new_entries + previous)[:self.max_entries]
+            }
+        return new_entries
+
+    def fetch_all(self, feeds: Dict[str, str]) -> Dict[str, List[Dict]]:
+        """{feed name: new entries} for every feed, fetched concurrently"""
+        results = {}
+
+        def fetch_one(item):
+            name, url = item
+            try:
+                return name, self.fetch(name, url)
+            except Exception as e:
+                with self._lock:
+                    self.stats['failed'] += 1
+                print(f"   ⚠️ {name} RSS failed: {str(e)[:50]}")
+                return name, []
+
+        if feeds:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(feeds))) as executor:
+                for name, entries in executor.map(fetch_one, feeds.items()):
+                    results[name] = entries
+            self.save()
+        return results
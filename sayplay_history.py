@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY CONTENT HISTORY STORE
+=============================
+
+SQLite-backed history of everything we published.
+
+- Append-only: saving a post is one INSERT, nothing is rewritten
+- Indexed by date and theme: range/theme lookups are B-tree seeks,
+  no full load and no per-row date parsing
+- Keeps the full history for analytics (no 30-day pruning)
+- Imports the legacy content_history.json on first use, then removes
+  it so no stale copy is left behind
+- since_id() returns only rows added after a known id, for incremental
+  consumers (the novelty index)
+"""
+
+import os
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, List, Optional
+
+HISTORY_DB = 'content_history.db'
+LEGACY_HISTORY_JSON = 'content_history.json'
+
+# ============================================================================
+# HISTORY STORE
+# ============================================================================
+
+class HistoryStore:
+    """Indexed, append-only content history"""
+
+    def __init__(self, path: str = HISTORY_DB, legacy_json: str = LEGACY_HISTORY_JSON):
+        self.path = path
+        self._lock = threading.Lock()
+        # Pipeline stages save from worker threads
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS entries (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                date TEXT NOT NULL,
+                title TEXT NOT NULL DEFAULT '',
+                theme TEXT NOT NULL DEFAULT '',
+                platforms TEXT NOT NULL DEFAULT '[]'
+            );
+            CREATE INDEX IF NOT EXISTS idx_entries_date ON entries(date);
+            CREATE INDEX IF NOT EXISTS idx_entries_theme ON entries(theme);
+        """)
+        self._import_legacy(legacy_json)
+
+    def _import_legacy(self, legacy_json: str):
+        """One-off import of the old JSON history (only into an empty store)"""
+        if not legacy_json or not os.path.exists(legacy_json) or self.count():
+            return
+        try:
+            with open(legacy_json, 'r') as f:
+                data = json.load(f)
+        except:
+            return
+
+        for entry in sorted(data, key=lambda e: e.get('date', '')):
+            if 'theme' not in entry:
+                entry['theme'] = entry.get('title', '').split('|')[0].strip()
+            if entry.get('date'):
+                self.append(entry, date=entry['date'])
+        print(f"   📚 Imported {len(data)} entries from {legacy_json}")
+
+        # The store is the only history from now on
+        if self.count():
+            try:
+                os.remove(legacy_json)
+            except OSError:
+                pass
+
+    def _rows(self, sql: str, params: tuple = ()) -> List[Dict]:
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [
+            {
+                'id': row['id'],
+                'date': row['date'],
+                'title': row['title'],
+                'theme': row['theme'],
+                'platforms': json.loads(row['platforms'])
+            }
+            for row in rows
+        ]
+
+    def append(self, entry: Dict, date: Optional[str] = None):
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO entries (date, title, theme, platforms) VALUES (?, ?, ?, ?)",
+                (
+                    date or datetime.now().isoformat(),
+                    entry.get('title', ''),
+                    entry.get('theme', ''),
+                    json.dumps(entry.get('platforms', []))
+                )
+            )
+            self.conn.commit()
+
+    def count(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def range(self, start: datetime, end: Optional[datetime] = None) -> List[Dict]:
+        """Entries with start < date <= end (end defaults to now), oldest first"""
+        end = end or datetime.now()
+        return self._rows(
+            "SELECT * FROM entries WHERE date > ? AND date <= ? ORDER BY date",
+            (start.isoformat(), end.isoformat())
+        )
+
+    def themes_since(self, cutoff: datetime) -> List[str]:
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT theme FROM entries WHERE date > ? AND theme != '' ORDER BY date",
+                (cutoff.isoformat(),)
+            ).fetchall()
+        return [row[0] for row in rows]
+
+    def by_theme(self, theme: str) -> List[Dict]:
+        return self._rows("SELECT * FROM entries WHERE theme = ? ORDER BY date", (theme,))
+
+    def all(self) -> List[Dict]:
+        return self._rows("SELECT * FROM entries ORDER BY date")
+
+    def last_id(self) -> int:
+        with self._lock:
+            return self.conn.execute("SELECT COALESCE(MAX(id), 0) FROM entries").fetchone()[0]
+
+    def since_id(self, last_id: int) -> List[Dict]:
+        """Entries appended after row last_id, in insertion order"""
+        return self._rows("SELECT * FROM entries WHERE id > ? ORDER BY id", (last_id,))
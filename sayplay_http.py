@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY SHARED HTTP TRANSPORT
+=============================
+
+One pooled HTTP client shared by every publisher and scraper:
+- Per-host connection pools with keep-alive (no new TCP+TLS per call)
+- Bounded by default (connect retry only); opt-in retry/backoff policy
+  per request (429/5xx, Retry-After aware)
+- Metrics: requests, new connections, pool reuse, handshake time
+
+Note: requests/urllib3 speak HTTP/1.1 only. Keep-alive pooling gives the
+same "one handshake per host" win that HTTP/2 would for our call volume.
+"""
+
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+class HttpMetrics:
+    """Thread-safe per-host counters for requests, connections and handshakes"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hosts = {}
+
+    def _host(self, host: str) -> Dict:
+        return self.hosts.setdefault(host, {
+            'requests': 0,
+            'connections': 0,
+            'handshake_seconds': 0.0,
+            'request_seconds': 0.0
+        })
+
+    def record_connection(self, host: str, seconds: float):
+        with self._lock:
+            stats = self._host(host)
+            stats['connections'] += 1
+            stats['handshake_seconds'] += seconds
+
+    def record_request(self, host: str, seconds: float):
+        with self._lock:
+            stats = self._host(host)
+            stats['requests'] += 1
+            stats['request_seconds'] += seconds
+
+    def snapshot(self) -> Dict:
+        """Per-host metrics including pool reuse ratio and avg handshake"""
+        with self._lock:
+            report = {}
+            for host, stats in self.hosts.items():
+                requests_made = stats['requests']
+                connections = stats['connections']
+                reused = max(requests_made - connections, 0)
+                report[host] = {
+                    'requests': requests_made,
+                    'connections': connections,
+                    'reused': reused,
+                    'reuse_ratio': round(reused / requests_made, 2) if requests_made else 0.0,
+                    'avg_handshake_ms': round(stats['handshake_seconds'] / connections * 1000, 1) if connections else 0.0,
+                    'avg_request_ms': round(stats['request_seconds'] / requests_made * 1000, 1) if requests_made else 0.0
+                }
+            return report
+
+_metrics = HttpMetrics()
+
+# ============================================================================
+# TIMED CONNECTIONS (handshake measurement)
+# ============================================================================
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        _metrics.record_connection(self.host, time.perf_counter() - started)
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        _metrics.record_connection(self.host, time.perf_counter() - started)
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+class PooledAdapter(HTTPAdapter):
+    """HTTPAdapter whose per-host pools time every new connection"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': _TimedHTTPConnectionPool,
+            'https': _TimedHTTPSConnectionPool
+        }
+
+# ============================================================================
+# SHARED CLIENT
+# ============================================================================
+
+class HttpClient:
+    """
+    Shared session used by all publishers and scrapers.
+
+    By default only failed connection attempts are retried (once), so a
+    request's timeout= really bounds it and callers' deadlines hold.
+    Callers with no deadline can opt in per request with retry=True:
+    idempotent requests are then retried on read errors and 429/5xx with
+    exponential backoff. POSTs are never re-sent after the request went
+    out, so nothing is published twice.
+    """
+
+    def __init__(self, pool_hosts: int = 20, pool_size: int = 10,
+                 retries: int = 3, backoff: float = 1.0):
+        bounded = Retry(total=1, connect=1, read=0, status=0, redirect=5, raise_on_status=False)
+        retrying = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            respect_retry_after_header=True,
+            raise_on_status=False
+        )
+        self.session = self._session(PooledAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size,
+                                                   max_retries=bounded))
+        self.retry_session = self._session(PooledAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size,
+                                                         max_retries=retrying))
+
+    def _session(self, adapter: HTTPAdapter) -> requests.Session:
+        session = requests.Session()
+        session.headers['User-Agent'] = 'SayPlay Marketing/3.0'
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.hooks['response'].append(self._record)
+        return session
+
+    def _record(self, response, *args, **kwargs):
+        host = urlparse(response.url).hostname or ''
+        _metrics.record_request(host, response.elapsed.total_seconds())
+
+    def request(self, method: str, url: str, retry: bool = False, **kwargs) -> requests.Response:
+        kwargs.setdefault('timeout', 30)
+        session = self.retry_session if retry else self.session
+        return session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def metrics(self) -> Dict:
+        return _metrics.snapshot()
+
+    def print_metrics(self):
+        report = self.metrics()
+        if not report:
+            return
+        print("🌐 HTTP pool metrics:")
+        for host, stats in sorted(report.items()):
+            print(f"   {host}: {stats['requests']} requests, "
+                  f"{stats['connections']} new connections "
+                  f"({stats['reuse_ratio']:.0%} reused), "
+                  f"handshake avg {stats['avg_handshake_ms']}ms")
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_http_client() -> HttpClient:
+    """Process-wide shared client (created on first use)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY LLM RESPONSE CACHE
+==========================
+
+Persistent cache for Gemini responses so reruns don't spend quota twice.
+
+- Key: (model, normalised prompt hash, generation config)
+- TTL: entries older than the TTL are ignored and dropped
+- Size-bounded: least-recently-used entries are evicted
+- Stored in cache/llm_cache.json (committed by the daily workflow)
+"""
+
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+LLM_CACHE_FILE = os.path.join('cache', 'llm_cache.json')
+
+# ============================================================================
+# RESPONSE CACHE
+# ============================================================================
+
+class ResponseCache:
+    """TTL + LRU cache of model responses, persisted as JSON"""
+
+    def __init__(self, path: str = LLM_CACHE_FILE, ttl: timedelta = timedelta(hours=24),
+                 max_entries: int = 100):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self.entries = self._load()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except:
+                pass
+        return {}
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_file = self.path + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(self.entries, f, indent=2)
+            os.replace(tmp_file, self.path)
+        except Exception as e:
+            print(f"   ⚠️ Could not save LLM cache: {str(e)[:50]}")
+
+    @staticmethod
+    def key(model: str, prompt: str, config: Optional[Dict] = None) -> str:
+        """Whitespace-insensitive key for (model, prompt, config)"""
+        normalised = ' '.join(prompt.split())
+        prompt_hash = hashlib.sha256(normalised.encode('utf-8')).hexdigest()
+        raw = json.dumps({'model': model, 'prompt': prompt_hash, 'config': config or {}}, sort_keys=True)
+        return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+    def _expired(self, entry: Dict) -> bool:
+        try:
+            return datetime.now() - datetime.fromisoformat(entry['created']) > self.ttl
+        except (KeyError, ValueError):
+            return True
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or self._expired(entry):
+                self.misses += 1
+                return None
+            entry['last_used'] = datetime.now().isoformat()
+            self.hits += 1
+            self._save()
+            return entry['response']
+
+    def put(self, key: str, response: str, model: str = ''):
+        if not response:
+            return
+        with self._lock:
+            now = datetime.now().isoformat()
+            self.entries[key] = {
+                'model': model,
+                'response': response,
+                'created': now,
+                'last_used': now
+            }
+
+            # Drop expired entries, then evict least recently used
+            self.entries = {k: v for k, v in self.entries.items() if not self._expired(v)}
+            if len(self.entries) > self.max_entries:
+                by_use = sorted(self.entries, key=lambda k: self.entries[k].get('last_used', ''))
+                for old_key in by_use[:len(self.entries) - self.max_entries]:
+                    del self.entries[old_key]
+
+            self._save()
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_response_cache() -> ResponseCache:
+    """Process-wide shared cache"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache
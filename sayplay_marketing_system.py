@@ -19,19 +19,25 @@ import sys
 import json
 import time
 import random
-import requests
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from urllib.parse import quote
-import re
 
 # AI & Research Libraries
 import google.generativeai as genai
-from duckduckgo_search import DDGS
-import feedparser
 from bs4 import BeautifulSoup
-from PIL import Image, ImageDraw, ImageFont
-import io
+
+# Shared infrastructure (HTTP pool, asset store, fallback images)
+from sayplay_http import get_http_client
+from sayplay_assets import get_asset_host, get_asset_store
+from sayplay_fallback import get_fallback_renderer
+from sayplay_llm_cache import get_response_cache
+from sayplay_history import HistoryStore
+from sayplay_novelty import NoveltyIndex
+from sayplay_quota import actual_tokens, estimate_tokens, get_quota
+from sayplay_feeds import FeedCache
+from sayplay_search import get_search_client
+from sayplay_structured import generate_structured
 
 # ============================================================================
 # PRODUCT INFORMATION - SAYPLAY
@@ -120,20 +126,50 @@ class FreeAIOrchestrator:
         
         # Initialize Gemini
         genai.configure(api_key=self.gemini_key)
-        self.model = genai.GenerativeModel('gemini-2.0-flash-exp')
+        self.model_name = 'gemini-2.0-flash-exp'
+        self.model = genai.GenerativeModel(self.model_name)
+        self.response_cache = get_response_cache()
+        self.search = get_search_client()
+        self.http = get_http_client()
+        self.assets = get_asset_store()
+        self.fallback = get_fallback_renderer()
         
         print("✅ FREE AI Orchestrator initialized")
         print(f"   🤖 Gemini 2.0 Flash: READY")
         print(f"   🔍 DuckDuckGo Search: READY")
         print(f"   🎨 Pollinations.ai: READY")
     
-    def generate_content(self, prompt: str, max_retries: int = 2) -> str:
-        """Generate content with Gemini (FREE 2M tokens/day)"""
+    def generate_content(self, prompt: str, max_retries: int = 2, use_cache: bool = True,
+                         config: Optional[Dict] = None,
+                         cache_if: Optional[Callable[[str], bool]] = None) -> str:
+        """
+        Generate content with Gemini (FREE 2M tokens/day). Only answers
+        that pass cache_if(text) (default: any non-empty one) are cached.
+        """
+        cache_key = self.response_cache.key(self.model_name, prompt, config)
+        if use_cache:
+            cached = self.response_cache.get(cache_key)
+            if cached is not None:
+                print("   ⚡ Using cached Gemini response")
+                return cached
+        
+        # Reserve prompt + a full answer against the per-minute buckets
+        estimated = estimate_tokens(prompt) + 2048
+        quota = get_quota(self.model_name)
         for attempt in range(max_retries):
+            if not quota.acquire(estimated):
+                raise Exception(f"Gemini quota exhausted: {quota.remaining()}")
             try:
-                response = self.model.generate_content(prompt)
+                if config:
+                    response = self.model.generate_content(prompt, generation_config=config)
+                else:
+                    response = self.model.generate_content(prompt)
+                quota.record(estimated, actual_tokens(response, prompt, response.text))
+                if use_cache and response.text and (cache_if is None or cache_if(response.text)):
+                    self.response_cache.put(cache_key, response.text, model=self.model_name)
                 return response.text
             except Exception as e:
+                quota.record(estimated, estimate_tokens(prompt))
                 print(f"   ⚠️ Gemini attempt {attempt + 1} failed: {str(e)[:100]}")
                 if attempt < max_retries - 1:
                     time.sleep(2)
@@ -141,22 +177,26 @@ class FreeAIOrchestrator:
                 raise
         return ""
     
+    def generate_json(self, prompt: str, schema: Dict, max_repairs: int = 1) -> Optional[Dict]:
+        """Schema-validated JSON; only malformed fields are re-asked. None if unrepairable"""
+        return generate_structured(
+            lambda text, config, cache_if: self.generate_content(text, config=config,
+                                                                 use_cache=cache_if is not None,
+                                                                 cache_if=cache_if),
+            prompt, schema, max_repairs=max_repairs
+        )
+    
+    def remaining_budget(self) -> Dict:
+        """Today's Gemini usage and remaining requests"""
+        return get_quota(self.model_name).remaining()
+    
     def search_web(self, query: str, max_results: int = 10) -> List[Dict]:
-        """FREE unlimited web search with DuckDuckGo"""
-        try:
-            ddgs = DDGS()
-            results = list(ddgs.text(query, max_results=max_results))
-            return [
-                {
-                    'title': r['title'],
-                    'snippet': r['body'],
-                    'url': r['href']
-                }
-                for r in results
-            ]
-        except Exception as e:
-            print(f"   ⚠️ DuckDuckGo search failed: {e}")
-            return []
+        """FREE unlimited web search with DuckDuckGo (cached, shared client)"""
+        return self.search.search_many([query], max_results=max_results)[query]
+    
+    def search_web_many(self, queries: List[str], max_results: int = 10) -> Dict[str, List[Dict]]:
+        """Concurrent, rate-limited searches; URLs deduplicated across queries"""
+        return self.search.search_many(queries, max_results=max_results)
     
     def generate_image(self, prompt: str) -> str:
         """FREE unlimited image generation with Pollinations.ai"""
@@ -165,13 +205,10 @@ class FreeAIOrchestrator:
             encoded_prompt = quote(prompt)
             image_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=1080&height=1080&nologo=true"
             
-            response = requests.get(image_url, timeout=30)
+            response = self.http.get(image_url, timeout=30, retry=True)
             
             if response.status_code == 200:
-                temp_file = f'/tmp/generated_image_{int(time.time())}.jpg'
-                with open(temp_file, 'wb') as f:
-                    f.write(response.content)
-                return temp_file
+                return self.assets.put_bytes(response.content, source='generated_image')
             else:
                 raise Exception(f"Image generation failed: {response.status_code}")
                 
@@ -182,34 +219,8 @@ class FreeAIOrchestrator:
     
     def _create_fallback_image(self, theme: str) -> str:
         """Create simple gradient fallback image"""
-        img = Image.new('RGB', (1080, 1080))
-        draw = ImageDraw.Draw(img)
-        
-        # Orange gradient (SayPlay brand)
-        for y in range(1080):
-            ratio = y / 1080
-            r = int(255 + (255 - 255) * ratio)
-            g = int(140 + (107 - 140) * ratio)
-            b = int(66 + (53 - 66) * ratio)
-            draw.rectangle([(0, y), (1080, y+1)], fill=(r, g, b))
-        
-        try:
-            font = ImageFont.truetype("/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf", 80)
-        except:
-            font = ImageFont.load_default()
-        
-        # Add text
-        text = "SayPlay"
-        bbox = draw.textbbox((0, 0), text, font=font)
-        text_width = bbox[2] - bbox[0]
-        text_height = bbox[3] - bbox[1]
-        x = (1080 - text_width) // 2
-        y = (1080 - text_height) // 2
-        draw.text((x, y), text, fill='white', font=font)
-        
-        temp_file = f'/tmp/fallback_image_{int(time.time())}.jpg'
-        img.save(temp_file, 'JPEG', quality=95)
-        return temp_file
+        data = self.fallback.render()
+        return self.assets.put_bytes(data, source='fallback_image')
 
 # ============================================================================
 # FREE RESEARCH ENGINE
@@ -223,8 +234,21 @@ class FreeResearchEngine:
     - BeautifulSoup scraping
     """
     
+    NEW_POSTS_PER_FEED = 5
+    
+    ANALYSIS_SCHEMA = {
+        'type': 'object',
+        'properties': {
+            'themes': {'type': 'array', 'items': {'type': 'string', 'minLength': 3}, 'minItems': 3, 'maxItems': 5},
+            'keywords': {'type': 'array', 'items': {'type': 'string', 'minLength': 2}, 'minItems': 3},
+            'opportunities': {'type': 'array', 'items': {'type': 'string', 'minLength': 3}, 'minItems': 1}
+        },
+        'required': ['themes', 'keywords', 'opportunities']
+    }
+    
     def __init__(self, ai: FreeAIOrchestrator):
         self.ai = ai
+        self.feed_cache = FeedCache()
         
         # UK Gift Blogs RSS Feeds (FREE!)
         self.rss_feeds = {
@@ -252,27 +276,25 @@ class FreeResearchEngine:
             'voice message gifts'
         ]
         
-        for query in queries:
-            results = self.ai.search_web(query, max_results=5)
+        for query, results in self.ai.search_web_many(queries, max_results=5).items():
             if results:
                 trends['web_search'].extend(results)
                 print(f"   ✅ Found {len(results)} results for '{query}'")
-            time.sleep(1)  # Be polite
+        print(f"   🔍 Search cache: {self.ai.search.hits} hits, {self.ai.search.misses} misses")
         
-        # 2. RSS Feeds (FREE!)
+        # 2. RSS Feeds (FREE!) - conditional GETs, only new posts surface
         print("   📰 Checking gift blog RSS feeds...")
-        for blog_name, feed_url in self.rss_feeds.items():
-            try:
-                feed = feedparser.parse(feed_url)
-                for entry in feed.entries[:3]:
-                    trends['blog_topics'].append({
-                        'source': blog_name,
-                        'title': entry.title,
-                        'link': entry.link
-                    })
-                print(f"   ✅ {blog_name}: {len(feed.entries[:3])} posts")
-            except Exception as e:
-                print(f"   ⚠️ {blog_name} RSS failed: {e}")
+        new_posts = self.feed_cache.fetch_all(self.rss_feeds)
+        for blog_name, entries in new_posts.items():
+            for entry in entries[:self.NEW_POSTS_PER_FEED]:
+                trends['blog_topics'].append({
+                    'source': blog_name,
+                    'title': entry['title'],
+                    'link': entry['link']
+                })
+            print(f"   ✅ {blog_name}: {len(entries)} new posts")
+        stats = self.feed_cache.stats
+        print(f"   📰 Feeds: {stats['fetched']} changed, {stats['not_modified']} unchanged, {stats['failed']} failed")
         
         # 3. Extract keywords with AI
         print("   🤖 AI analyzing trends...")
@@ -288,24 +310,19 @@ class FreeResearchEngine:
         3. Content opportunities for SayPlay voice message stickers
         
         Trends: {all_text}
-        
-        Return JSON format:
-        {{
-            "themes": ["theme1", "theme2", ...],
-            "keywords": ["keyword1", "keyword2", ...],
-            "opportunities": ["opportunity1", "opportunity2", ...]
-        }}
         """
         
         try:
-            analysis = self.ai.generate_content(keyword_prompt)
-            # Extract JSON
-            json_match = re.search(r'\{.*\}', analysis, re.DOTALL)
-            if json_match:
-                trends['analysis'] = json.loads(json_match.group())
-                print(f"   ✅ Identified {len(trends['analysis'].get('themes', []))} trending themes")
+            analysis = self.ai.generate_json(keyword_prompt, self.ANALYSIS_SCHEMA)
         except Exception as e:
             print(f"   ⚠️ Keyword analysis failed: {e}")
+            analysis = None
+        
+        if analysis:
+            trends['analysis'] = analysis
+            print(f"   ✅ Identified {len(analysis['themes'])} trending themes")
+        else:
+            print("   ⚠️ Using fallback trend analysis")
             trends['analysis'] = {
                 'themes': ['personalized gifts', 'unique presents', 'voice messages'],
                 'keywords': ['gift ideas', 'personalization', 'memorable'],
@@ -325,8 +342,12 @@ class AIFirstContentGenerator:
     - AI Search (ChatGPT, Claude, Perplexity)
     """
     
-    def __init__(self, ai: FreeAIOrchestrator):
+    # Shorter bodies are truncated or refusals: retried, never cached
+    MIN_BLOG_CHARS = 500
+    
+    def __init__(self, ai: FreeAIOrchestrator, novelty: Optional[NoveltyIndex] = None):
         self.ai = ai
+        self.novelty = novelty
     
     def generate_dual_optimized_blog(self, trends: Dict, history: List[str]) -> Dict:
         """
@@ -401,12 +422,16 @@ Tags: [tag1, tag2, tag3, tag4, tag5]
         for attempt in range(max_retries):
             try:
                 print(f"   🤖 AI generation attempt {attempt + 1}/{max_retries}...")
-                content = self.ai.generate_content(blog_prompt)
+                # A short answer isn't cached, so the retry asks the model again
+                content = self.ai.generate_content(
+                    blog_prompt,
+                    cache_if=lambda text: len(self._parse_blog_content(text)['content']) > self.MIN_BLOG_CHARS
+                )
                 
                 # Parse content
                 blog = self._parse_blog_content(content)
                 
-                if len(blog['content']) > 500:
+                if len(blog['content']) > self.MIN_BLOG_CHARS:
                     print(f"   ✅ Blog post generated: {len(blog['content'])} chars")
                     
                     # Add schemas
@@ -453,23 +478,21 @@ Tags: [tag1, tag2, tag3, tag4, tag5]
             for theme in trends['analysis']['themes']:
                 themes.append(f"{theme.title()} - Ultimate Guide 2025")
         
-        # Filter out recent themes
-        recent_keywords = set()
-        for hist in history[-7:]:  # Last 7 days
-            recent_keywords.update(hist.lower().split())
+        # Score every candidate against the whole history (TF-IDF index);
+        # without a persistent index, fall back to the titles passed in
+        index = self.novelty or NoveltyIndex.from_titles(history)
+        scored_themes = index.score_many(themes)
         
-        # Score themes
-        scored_themes = []
-        for theme in themes:
-            theme_words = set(theme.lower().split())
-            overlap = len(theme_words & recent_keywords)
-            scored_themes.append((theme, overlap))
+        # Most novel wins; ties keep pool order
+        best, novelty, nearest = max(scored_themes, key=lambda x: x[1])
+        if nearest:
+            print(f"   🧭 Novelty {novelty:.2f} (closest past title: {nearest[:60]})")
         
-        # Sort by least overlap (most unique)
-        scored_themes.sort(key=lambda x: x[1])
+        near_dupes = sum(1 for _, n, _ in scored_themes if n == 0)
+        if near_dupes:
+            print(f"   🚫 Skipped {near_dupes} near-duplicate themes")
         
-        # Return most unique theme
-        return scored_themes[0][0]
+        return best
     
     def _parse_blog_content(self, content: str) -> Dict:
         """Parse AI-generated blog content"""
@@ -803,6 +826,8 @@ class MultiPlatformPublisher:
         self.shopify_token = os.getenv('SHOPIFY_ACCESS_TOKEN')
         self.fb_token = os.getenv('FACEBOOK_PAGE_TOKEN')
         self.ig_account = os.getenv('INSTAGRAM_BUSINESS_ACCOUNT_ID')
+        self.http = get_http_client()
+        self.hosting = get_asset_host()
         
         if not all([self.shopify_shop, self.shopify_token]):
             print("   ⚠️ Shopify credentials missing")
@@ -851,7 +876,7 @@ class MultiPlatformPublisher:
                 "Content-Type": "application/json"
             }
             
-            response = requests.post(url, json=data, headers=headers, timeout=30)
+            response = self.http.post(url, json=data, headers=headers, timeout=30)
             
             if response.status_code in [200, 201]:
                 article = response.json()['article']
@@ -887,17 +912,9 @@ class MultiPlatformPublisher:
             
             print(f"   📝 Caption: {len(caption)} chars")
             
-            # Upload to Catbox (FREE!)
-            with open(image_path, 'rb') as img:
-                files = {'fileToUpload': img}
-                data = {'reqtype': 'fileupload'}
-                response = requests.post('https://catbox.moe/user/api.php', data=data, files=files, timeout=30)
-            
-            if response.status_code != 200:
-                raise Exception(f"Catbox upload failed: {response.status_code}")
-            
-            image_url = response.text.strip()
-            print(f"   ✅ Image uploaded: {image_url}")
+            # Upload to Catbox (FREE!) - once per image, shared with Facebook
+            image_url = self.hosting.public_url(image_path)
+            print(f"   ✅ Image hosted: {image_url}")
             
             # Create Instagram container
             container_url = f'https://graph.facebook.com/v18.0/{self.ig_account}/media'
@@ -908,7 +925,7 @@ class MultiPlatformPublisher:
             }
             
             print(f"   📦 Creating container...")
-            container_response = requests.post(container_url, data=container_data, timeout=30)
+            container_response = self.http.post(container_url, data=container_data, timeout=30)
             
             if container_response.status_code != 200:
                 raise Exception(f"Container failed: {container_response.text}")
@@ -916,9 +933,11 @@ class MultiPlatformPublisher:
             container_id = container_response.json()['id']
             print(f"   ✅ Container: {container_id}")
             
-            # Wait for Instagram to process
-            print(f"   ⏳ Waiting 20 seconds...")
-            time.sleep(20)
+            # Publish as soon as Instagram has processed the container
+            print(f"   ⏳ Waiting for container processing...")
+            status = self._wait_for_container(container_id)
+            if status != 'FINISHED':
+                raise Exception(f"Container not ready: {status}")
             
             # Publish
             publish_url = f'https://graph.facebook.com/v18.0/{self.ig_account}/media_publish'
@@ -928,7 +947,7 @@ class MultiPlatformPublisher:
             }
             
             print(f"   🚀 Publishing...")
-            publish_response = requests.post(publish_url, data=publish_data, timeout=30)
+            publish_response = self.http.post(publish_url, data=publish_data, timeout=30)
             
             if publish_response.status_code != 200:
                 raise Exception(f"Publish failed: {publish_response.text}")
@@ -941,6 +960,42 @@ class MultiPlatformPublisher:
             print(f"   ❌ Instagram error: {str(e)[:200]}")
             return None
     
+    def _container_status(self, container_id: str) -> str:
+        response = self.http.get(
+            f'https://graph.facebook.com/v18.0/{container_id}',
+            params={'fields': 'status_code', 'access_token': self.fb_token},
+            timeout=15
+        )
+        if response.status_code != 200:
+            return 'UNKNOWN'
+        return response.json().get('status_code', 'UNKNOWN')
+    
+    def _wait_for_container(self, container_id: str, timeout: float = 120,
+                            first_delay: float = 1.0, max_delay: float = 10.0) -> str:
+        """
+        Poll a media container until it is FINISHED (or ERROR/EXPIRED).
+        Backs off 1s → 1.5s → 2.25s ... up to max_delay; returns 'TIMEOUT'
+        if Instagram hasn't finished within the timeout.
+        """
+        started = time.time()
+        delay = first_delay
+        while True:
+            try:
+                status = self._container_status(container_id)
+            except Exception as e:
+                print(f"   ⚠️ Status check failed: {str(e)[:100]}")
+                status = 'UNKNOWN'
+            
+            if status in ('FINISHED', 'ERROR', 'EXPIRED'):
+                print(f"   ✅ Container {container_id}: {status} after {time.time() - started:.1f}s")
+                return status
+            
+            if time.time() - started + delay > timeout:
+                print(f"   ⏰ Container {container_id} still {status} after {timeout}s")
+                return 'TIMEOUT'
+            time.sleep(delay)
+            delay = min(delay * 1.5, max_delay)
+    
     def publish_to_facebook(self, caption: str, image_path: str) -> Optional[str]:
         """Publish to Facebook Page (with error handling)"""
         print("\n" + "=" * 80)
@@ -948,14 +1003,9 @@ class MultiPlatformPublisher:
         print("=" * 80)
         
         try:
-            # Upload to Catbox
-            with open(image_path, 'rb') as img:
-                files = {'fileToUpload': img}
-                data = {'reqtype': 'fileupload'}
-                response = requests.post('https://catbox.moe/user/api.php', data=data, files=files, timeout=30)
-            
-            image_url = response.text.strip()
-            print(f"   ✅ Image uploaded: {image_url}")
+            # Upload to Catbox (reuses the Instagram upload)
+            image_url = self.hosting.public_url(image_path)
+            print(f"   ✅ Image hosted: {image_url}")
             
             # Post to Facebook
             # Implementation here...
@@ -975,45 +1025,19 @@ class ContentHistory:
     
     def __init__(self, history_file: str = 'content_history.json'):
         self.history_file = history_file
-        self.history = self._load_history()
-    
-    def _load_history(self) -> List[Dict]:
-        """Load history from file"""
-        if os.path.exists(self.history_file):
-            try:
-                with open(self.history_file, 'r') as f:
-                    return json.load(f)
-            except:
-                return []
-        return []
+        self.store = HistoryStore(legacy_json=history_file)
     
     def save_history(self, entry: Dict):
-        """Save new entry to history"""
-        self.history.append({
-            'date': datetime.now().isoformat(),
+        """Save new entry to history (one indexed INSERT)"""
+        self.store.append({
             'title': entry.get('title', ''),
             'theme': entry.get('theme', ''),
             'platforms': entry.get('platforms', [])
         })
-        
-        # Keep last 30 days only
-        cutoff = datetime.now() - timedelta(days=30)
-        self.history = [
-            h for h in self.history 
-            if datetime.fromisoformat(h['date']) > cutoff
-        ]
-        
-        with open(self.history_file, 'w') as f:
-            json.dump(self.history, f, indent=2)
     
     def get_recent_themes(self, days: int = 7) -> List[str]:
         """Get themes from last N days"""
-        cutoff = datetime.now() - timedelta(days=days)
-        recent = [
-            h['theme'] for h in self.history
-            if datetime.fromisoformat(h['date']) > cutoff
-        ]
-        return recent
+        return self.store.themes_since(datetime.now() - timedelta(days=days))
 
 # ============================================================================
 # MAIN ENTERPRISE SYSTEM
@@ -1034,10 +1058,14 @@ def main():
         # Initialize systems
         ai = FreeAIOrchestrator()
         research = FreeResearchEngine(ai)
-        content_gen = AIFirstContentGenerator(ai)
+        history = ContentHistory()
+        novelty = NoveltyIndex()
+        # Only rows added since the last run (all of them if the store was rebuilt)
+        last_indexed = novelty.last_id if novelty.last_id <= history.store.last_id() else 0
+        novelty.sync(history.store.since_id(last_indexed))
+        content_gen = AIFirstContentGenerator(ai, novelty)
         image_gen = FreeImageGenerator(ai)
         publisher = MultiPlatformPublisher()
-        history = ContentHistory()
         
         # STEP 1: Research
         trends = research.research_trends()
@@ -1082,6 +1110,7 @@ def main():
         print(f"📘 Facebook: {'✅' if results['facebook'] else '❌'}")
         print(f"🛒 Shopify: {'✅' if results['shopify'] else '❌'}")
         print("=" * 80)
+        get_http_client().print_metrics()
         
         return 0
         
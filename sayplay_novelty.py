@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY THEME NOVELTY ENGINE
+============================
+
+Scores candidate blog themes against EVERY past title, not just last week:
+
+- Normalisation: lowercase, US/UK spelling folded, light stemming,
+  stopwords/years/numbers dropped ("Top 10 ... UK 2025" → core words)
+- TF-IDF weighting, so common words ("gift", "ideas") count for little
+- Inverted index: a candidate is only compared with titles sharing a
+  term, so thousands of candidates score in bulk in well under 1ms each
+- Persistent: tokenised titles live in cache/novelty_index.json along
+  with the last history row indexed, so each run only reads newer rows
+"""
+
+import os
+import re
+import json
+import math
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+NOVELTY_INDEX_FILE = os.path.join('cache', 'novelty_index.json')
+
+STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'beyond', 'best', 'by', 'can',
+    'for', 'from', 'guide', 'how', 'in', 'into', 'is', 'it', 'its', 'love',
+    'of', 'on', 'or', 'that', 'the', 'their', 'them', 'they', 'this', 'to',
+    'top', 'ultimate', 'uk', 'what', 'when', 'why', 'will', 'with', 'you',
+    'your', 'sayplay'
+}
+
+# ============================================================================
+# TEXT NORMALISATION
+# ============================================================================
+
+def _stem(word: str) -> str:
+    word = re.sub(r'iz(e|ed|es|ing|ation)$', r'is\1', word)
+    for suffix, replacement in (('isation', 'is'), ('ations', ''), ('ation', ''),
+                                ('ies', 'y'), ('ing', ''), ('ised', 'is'),
+                                ('ises', 'is'), ('ise', 'is'), ('ed', ''), ('s', '')):
+        if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+            return word[:-len(suffix)] + replacement
+    return word
+
+def tokenize(text: str) -> List[str]:
+    words = re.findall(r"[a-z]+", text.lower().replace("'", ''))
+    return [_stem(w) for w in words if w not in STOPWORDS and len(w) > 1]
+
+# ============================================================================
+# NOVELTY INDEX
+# ============================================================================
+
+class NoveltyIndex:
+    """TF-IDF inverted index over past titles"""
+
+    NEAR_DUPLICATE = 0.8
+
+    def __init__(self, path: Optional[str] = NOVELTY_INDEX_FILE, half_life_days: float = 90):
+        self.path = path
+        self.half_life_days = half_life_days
+        self.docs = []
+        self.keys = set()
+        self.postings = {}
+        self.last_id = 0
+        self._norms = None
+        if path:
+            self._load()
+
+    @classmethod
+    def from_titles(cls, titles: List[str]) -> 'NoveltyIndex':
+        """Throwaway in-memory index (no persistence)"""
+        index = cls(path=None)
+        for title in titles:
+            index.add(title)
+        return index
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            for doc in data.get('docs', []):
+                self._index(doc)
+            self.last_id = data.get('last_id', 0)
+        except Exception as e:
+            print(f"   ⚠️ Novelty index unreadable, rebuilding: {str(e)[:50]}")
+            self.docs, self.keys, self.postings, self.last_id = [], set(), {}, 0
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_file = self.path + '.tmp'
+        with open(tmp_file, 'w') as f:
+            json.dump({'docs': self.docs, 'last_id': self.last_id}, f)
+        os.replace(tmp_file, self.path)
+
+    def _index(self, doc: Dict):
+        doc_id = len(self.docs)
+        self.docs.append(doc)
+        self.keys.add(doc['key'])
+        for token, tf in doc['terms'].items():
+            self.postings.setdefault(token, []).append((doc_id, tf))
+        self._norms = None
+
+    def add(self, title: str, date: Optional[str] = None) -> bool:
+        key = f"{date or ''}|{title}"
+        if key in self.keys:
+            return False
+        terms = {}
+        for token in tokenize(title):
+            terms[token] = terms.get(token, 0) + 1
+        self._index({'key': key, 'title': title, 'date': date or '', 'terms': terms})
+        return True
+
+    def sync(self, entries: List[Dict]) -> int:
+        """
+        Add history entries not indexed yet; returns how many were added.
+        Entries carrying a store 'id' advance last_id, so callers can pass
+        HistoryStore.since_id(index.last_id) instead of the full history.
+        """
+        added = sum(
+            1 for e in entries
+            if (e.get('title') or e.get('theme')) and self.add(e.get('title') or e.get('theme'), e.get('date'))
+        )
+        last_id = max([self.last_id] + [e['id'] for e in entries if e.get('id')])
+        if added or last_id != self.last_id:
+            self.last_id = last_id
+            self.save()
+        return added
+
+    def _idf(self, token: str) -> float:
+        df = len(self.postings.get(token, ()))
+        return math.log((len(self.docs) + 1) / (df + 1)) + 1
+
+    def _doc_norms(self) -> List[float]:
+        if self._norms is None:
+            idf = {token: self._idf(token) for token in self.postings}
+            self._norms = [
+                math.sqrt(sum((tf * idf[t]) ** 2 for t, tf in doc['terms'].items())) or 1.0
+                for doc in self.docs
+            ]
+        return self._norms
+
+    def _recency_weight(self, date: str, now: datetime) -> float:
+        """Recent titles count fully, old ones fade (but never below 0.25)"""
+        try:
+            age = (now - datetime.fromisoformat(date)).days
+        except ValueError:
+            return 1.0
+        return max(0.5 ** (max(age, 0) / self.half_life_days), 0.25)
+
+    def score_many(self, candidates: List[str]) -> List[Tuple[str, float, str]]:
+        """(candidate, novelty 0..1, nearest past title) for every candidate"""
+        norms = self._doc_norms()
+        now = datetime.now()
+        weights = [self._recency_weight(doc['date'], now) for doc in self.docs]
+        idf_cache = {}
+
+        results = []
+        for candidate in candidates:
+            query = {}
+            for token in tokenize(candidate):
+                query[token] = query.get(token, 0) + 1
+            for token in query:
+                if token not in idf_cache:
+                    idf_cache[token] = self._idf(token)
+            q_weights = {t: tf * idf_cache[t] for t, tf in query.items()}
+            q_norm = math.sqrt(sum(w * w for w in q_weights.values())) or 1.0
+
+            dots = {}
+            for token, q_weight in q_weights.items():
+                idf = idf_cache[token]
+                for doc_id, tf in self.postings.get(token, ()):
+                    dots[doc_id] = dots.get(doc_id, 0.0) + q_weight * tf * idf
+
+            # Near-duplicates of ANY past title score 0, however old;
+            # otherwise similarity to recent titles weighs more
+            best_sim, best_raw, nearest = 0.0, 0.0, ''
+            for doc_id, dot in dots.items():
+                raw = dot / (q_norm * norms[doc_id])
+                sim = raw * weights[doc_id]
+                best_raw = max(best_raw, raw)
+                if sim > best_sim:
+                    best_sim, nearest = sim, self.docs[doc_id]['title']
+
+            novelty = 0.0 if best_raw >= self.NEAR_DUPLICATE else 1 - min(best_sim, 1.0)
+            results.append((candidate, round(novelty, 4), nearest))
+
+        return results
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY GEMINI QUOTA ACCOUNTANT
+===============================
+
+Client-side rate limiting so we stay under Gemini's free-tier limits
+instead of discovering them through 429s:
+
+- Token buckets for requests/minute and tokens/minute (per model); these
+  live in memory, so they only shape calls within one process
+- Token usage estimated before each call, corrected with real usage after
+- Daily consumption persisted in cache/gemini_quota.json (file-locked),
+  so parallel and repeated runs share one daily budget
+- remaining() exposes what's left today
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from typing import Dict, Optional
+
+try:
+    import fcntl  # cross-process locking (Linux/macOS runners)
+except ImportError:
+    fcntl = None
+
+QUOTA_FILE = os.path.join('cache', 'gemini_quota.json')
+
+# Free-tier limits (requests/min, tokens/min, requests/day)
+MODEL_LIMITS = {
+    'gemini-2.0-flash': {'rpm': 10, 'tpm': 4000000, 'rpd': 1500},
+    'gemini-1.5-flash': {'rpm': 15, 'tpm': 1000000, 'rpd': 1500},
+    'gemini-1.5-pro': {'rpm': 2, 'tpm': 32000, 'rpd': 50},
+    'gemini-1.0-pro': {'rpm': 15, 'tpm': 32000, 'rpd': 1500},
+    'gemini-pro': {'rpm': 15, 'tpm': 32000, 'rpd': 1500},
+    'default': {'rpm': 10, 'tpm': 250000, 'rpd': 1000}
+}
+
+def limits_for(model: str) -> Dict:
+    """Longest matching prefix wins (gemini-1.5-flash-latest → gemini-1.5-flash)"""
+    matches = [name for name in MODEL_LIMITS if model.startswith(name)]
+    return MODEL_LIMITS[max(matches, key=len)] if matches else MODEL_LIMITS['default']
+
+def estimate_tokens(text: str) -> int:
+    """~4 characters per token for English prose"""
+    return max(1, len(text) // 4)
+
+def actual_tokens(response, prompt: str, text: str) -> int:
+    """Real usage from the response when the SDK reports it, else an estimate"""
+    usage = getattr(response, 'usage_metadata', None)
+    total = getattr(usage, 'total_token_count', None)
+    return total or estimate_tokens(prompt) + estimate_tokens(text)
+
+# ============================================================================
+# TOKEN BUCKET
+# ============================================================================
+
+class TokenBucket:
+    """Refills `rate` units per second up to `capacity`"""
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+# ============================================================================
+# QUOTA ACCOUNTANT
+# ============================================================================
+
+class GeminiQuota:
+    """
+    Shapes calls for one model (per-minute buckets, this process only) and
+    accounts daily usage on disk (shared across processes)
+    """
+
+    def __init__(self, model: str, path: str = QUOTA_FILE):
+        self.model = model
+        self.path = path
+        self.limits = limits_for(model)
+        self._cond = threading.Condition()
+        self.requests = TokenBucket(self.limits['rpm'], self.limits['rpm'] / 60)
+        self.tokens = TokenBucket(self.limits['tpm'], self.limits['tpm'] / 60)
+
+    def _update_daily(self, requests: int = 0, tokens: int = 0) -> Dict:
+        """Atomically add to today's usage and return it"""
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path + '.lock', 'w') as lock:
+            if fcntl:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                data = {}
+                if os.path.exists(self.path):
+                    try:
+                        with open(self.path, 'r') as f:
+                            data = json.load(f)
+                    except:
+                        data = {}
+
+                today = datetime.now().strftime('%Y-%m-%d')
+                # Only today's counters matter; older days are dropped
+                data = {today: data.get(today, {})}
+                usage = data[today].setdefault(self.model, {'requests': 0, 'tokens': 0})
+                usage['requests'] += requests
+                usage['tokens'] += tokens
+
+                if requests or tokens:
+                    tmp_file = self.path + '.tmp'
+                    with open(tmp_file, 'w') as f:
+                        json.dump(data, f, indent=2)
+                    os.replace(tmp_file, self.path)
+                return dict(usage)
+            finally:
+                if fcntl:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def remaining(self) -> Dict:
+        usage = self._update_daily()
+        return {
+            'model': self.model,
+            'requests_today': usage['requests'],
+            'tokens_today': usage['tokens'],
+            'requests_remaining': max(self.limits['rpd'] - usage['requests'], 0)
+        }
+
+    def acquire(self, estimated_tokens: int, max_wait: float = 120) -> bool:
+        """
+        Block until a request of estimated_tokens fits the per-minute
+        buckets. Returns False (without waiting) when today's request
+        budget is spent, or if it would have to wait longer than max_wait.
+        """
+        if self.remaining()['requests_remaining'] <= 0:
+            print(f"   🛑 Daily Gemini quota for {self.model} used up")
+            return False
+
+        deadline = time.monotonic() + max_wait
+        with self._cond:
+            while True:
+                wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimated_tokens))
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(estimated_tokens)
+                    break
+                if time.monotonic() + wait > deadline:
+                    print(f"   🛑 Rate limiter: would need to wait {wait:.0f}s, giving up")
+                    return False
+                print(f"   ⏳ Rate limiter: pacing {wait:.1f}s")
+                self._cond.wait(wait)
+
+        # Reserve the request on disk right away so parallel runs see it
+        self._update_daily(requests=1)
+        return True
+
+    def record(self, estimated_tokens: int, actual_tokens: Optional[int] = None):
+        """Account tokens used; corrects the bucket if the estimate was off"""
+        used = actual_tokens if actual_tokens else estimated_tokens
+        with self._cond:
+            self.tokens.level -= used - estimated_tokens
+            self._cond.notify_all()
+        self._update_daily(tokens=used)
+
+_quotas = {}
+_quotas_lock = threading.Lock()
+
+def get_quota(model: str) -> GeminiQuota:
+    """One accountant per model, shared by every caller in the process"""
+    with _quotas_lock:
+        if model not in _quotas:
+            _quotas[model] = GeminiQuota(model)
+        return _quotas[model]
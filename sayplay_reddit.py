@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY REDDIT COLLECTOR
+========================
+
+Incremental Reddit research over one combined listing.
+
+- One r/a+b+c/new listing instead of one request per subreddit
+- Newest fullname remembered per subreddit; later runs stop paging as
+  soon as they reach posts already seen
+- Tracked posts refreshed in one /api/info call (100 ids per request)
+- Score/comment history kept per post (cache/reddit_posts.json), so posts
+  are ranked by momentum (velocity), not by raw score
+- Works through PRAW when credentials are set, else the public JSON API
+"""
+
+import os
+import json
+from datetime import datetime, timedelta
+from typing import Dict, Iterator, List, Optional
+
+from sayplay_http import get_http_client
+
+REDDIT_CACHE_FILE = os.path.join('cache', 'reddit_posts.json')
+USER_AGENT = 'SayPlay Marketing Research 1.0'
+
+def _field(post, name: str, default=None):
+    """Same accessor for PRAW submissions and JSON listing children"""
+    if isinstance(post, dict):
+        return post.get(name, default)
+    return getattr(post, name, default)
+
+def _id36(fullname: str) -> int:
+    """t3_abc → numeric id (ids grow with submission time)"""
+    return int(fullname.split('_', 1)[-1], 36)
+
+# ============================================================================
+# REDDIT COLLECTOR
+# ============================================================================
+
+class RedditCollector:
+    """Combined-listing collector with per-subreddit cursors"""
+
+    PAGE_SIZE = 100
+    MAX_POSTS = 300
+    TRACK_DAYS = 7
+    MAX_HISTORY = 30
+
+    def __init__(self, subreddits: List[str], reddit=None, path: str = REDDIT_CACHE_FILE):
+        self.subreddits = subreddits
+        self.reddit = reddit
+        self.path = path
+        self.http = get_http_client()
+        self.state = self._load()
+        self.requests = 0
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                data.setdefault('cursors', {})
+                data.setdefault('posts', {})
+                return data
+            except:
+                pass
+        return {'cursors': {}, 'posts': {}}
+
+    def save(self):
+        # Posts older than the tracking window stop mattering for momentum
+        cutoff = (datetime.now() - timedelta(days=self.TRACK_DAYS * 2)).timestamp()
+        self.state['posts'] = {
+            name: post for name, post in self.state['posts'].items()
+            if post.get('created', 0) >= cutoff
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_file = self.path + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_file, self.path)
+        except Exception as e:
+            print(f"   ⚠️ Could not save Reddit cache: {str(e)[:50]}")
+
+    # ------------------------------------------------------------------
+    # Backends
+    # ------------------------------------------------------------------
+
+    def _get_json(self, path: str, params: Dict, retry: bool = False) -> List[Dict]:
+        response = self.http.get(
+            f"https://www.reddit.com{path}",
+            params=params,
+            headers={'User-Agent': USER_AGENT},
+            timeout=10,
+            retry=retry
+        )
+        self.requests += 1
+        response.raise_for_status()
+        return [child['data'] for child in response.json()['data']['children']]
+
+    def _listing_new(self) -> Iterator:
+        """Newest-first stream of posts across every subreddit"""
+        multi = '+'.join(self.subreddits)
+        if self.reddit is not None:
+            yield from self.reddit.subreddit(multi).new(limit=self.MAX_POSTS)
+            return
+
+        after = None
+        fetched = 0
+        while fetched < self.MAX_POSTS:
+            params = {'limit': self.PAGE_SIZE, 'raw_json': 1}
+            if after:
+                params['after'] = after
+            page = self._get_json(f"/r/{multi}/new.json", params)
+            if not page:
+                return
+            yield from page
+            fetched += len(page)
+            after = page[-1]['name']
+
+    def _info(self, fullnames: List[str]) -> List:
+        if self.reddit is not None:
+            return list(self.reddit.info(fullnames=fullnames))
+        posts = []
+        for i in range(0, len(fullnames), self.PAGE_SIZE):
+            chunk = fullnames[i:i + self.PAGE_SIZE]
+            # Read-only refresh of known ids: safe to retry on 429/5xx
+            posts.extend(self._get_json('/api/info.json', {'id': ','.join(chunk), 'raw_json': 1}, retry=True))
+        return posts
+
+    # ------------------------------------------------------------------
+    # Collection
+    # ------------------------------------------------------------------
+
+    def _observe(self, post, now: str):
+        name = _field(post, 'name') or f"t3_{_field(post, 'id')}"
+        record = self.state['posts'].setdefault(name, {
+            'title': _field(post, 'title', ''),
+            'subreddit': str(_field(post, 'subreddit', '')),
+            'url': f"https://reddit.com{_field(post, 'permalink', '')}",
+            'created': float(_field(post, 'created_utc', 0) or 0),
+            'history': []
+        })
+        record['history'].append([now, int(_field(post, 'score', 0) or 0), int(_field(post, 'num_comments', 0) or 0)])
+        record['history'] = record['history'][-self.MAX_HISTORY:]
+
+    def refresh(self) -> Dict:
+        """Fetch posts newer than each cursor, then re-poll tracked posts"""
+        now = datetime.now().isoformat()
+        cursors = self.state['cursors']
+        known = dict(cursors)
+        complete = all(sub.lower() in known for sub in self.subreddits)
+        floor = min((_id36(c) for c in known.values()), default=0)
+
+        seen, oldest = set(), None
+        for post in self._listing_new():
+            name = _field(post, 'name') or f"t3_{_field(post, 'id')}"
+            # Everything from here on is older than every cursor
+            if complete and _id36(name) <= floor:
+                break
+            oldest = name
+            sub_key = str(_field(post, 'subreddit', '')).lower()
+            if sub_key in known and _id36(name) <= _id36(known[sub_key]):
+                continue
+            self._observe(post, now)
+            seen.add(name)
+            if sub_key not in cursors or _id36(name) > _id36(cursors[sub_key]):
+                cursors[sub_key] = name
+
+        # Quiet subreddits: nothing newer than what we just paged through
+        if oldest:
+            for sub in self.subreddits:
+                cursors.setdefault(sub.lower(), oldest)
+
+        # Re-poll posts still inside the tracking window for fresh counts
+        cutoff = (datetime.now() - timedelta(days=self.TRACK_DAYS)).timestamp()
+        tracked = sorted(
+            (name for name, post in self.state['posts'].items()
+             if name not in seen and post.get('created', 0) >= cutoff),
+            key=_id36, reverse=True
+        )[:self.PAGE_SIZE]
+        refreshed = 0
+        if tracked:
+            for post in self._info(tracked):
+                self._observe(post, now)
+                refreshed += 1
+
+        self.save()
+        return {'new': len(seen), 'refreshed': refreshed}
+
+    @staticmethod
+    def velocity(post: Dict) -> float:
+        """Engagement gained per hour (comments weigh double)"""
+        history = post.get('history', [])
+        if not history:
+            return 0.0
+        last_time, last_score, last_comments = history[-1]
+        if len(history) >= 2:
+            first_time, first_score, first_comments = history[0]
+            hours = (datetime.fromisoformat(last_time) - datetime.fromisoformat(first_time)).total_seconds() / 3600
+            if hours > 0:
+                # Back-to-back reruns shouldn't turn a few votes into a spike
+                gained = (last_score - first_score) + 2 * (last_comments - first_comments)
+                return round(gained / max(hours, 1.0), 3)
+        # Single observation: engagement since submission
+        age = datetime.fromisoformat(last_time).timestamp() - post.get('created', 0)
+        hours = max(age / 3600, 1.0)
+        return round((last_score + 2 * last_comments) / hours, 3)
+
+    def top(self, limit: int = 20, subreddits: Optional[List[str]] = None) -> List[Dict]:
+        """Tracked posts ranked by velocity"""
+        wanted = {s.lower() for s in (subreddits or self.subreddits)}
+        cutoff = (datetime.now() - timedelta(days=self.TRACK_DAYS)).timestamp()
+        ranked = []
+        for post in self.state['posts'].values():
+            if post['subreddit'].lower() not in wanted or post.get('created', 0) < cutoff:
+                continue
+            _, score, comments = post['history'][-1]
+            ranked.append({
+                'title': post['title'],
+                'score': score,
+                'comments': comments,
+                'subreddit': post['subreddit'],
+                'url': post['url'],
+                'created': post.get('created'),
+                'velocity': self.velocity(post)
+            })
+        ranked.sort(key=lambda p: p['velocity'], reverse=True)
+        return ranked[:limit]
@@ -0,0 +1,163 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY WEB SEARCH CLIENT
+=========================
+
+DuckDuckGo search for the research engine.
+
+- One DDGS client kept alive for the whole process
+- Queries run concurrently, paced by a shared politeness limiter
+- Results cached per normalised query with a TTL (cache/search_cache.json),
+  so evergreen queries don't hit the network every day
+- URLs deduplicated across the queries of one batch
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from duckduckgo_search import DDGS
+
+from sayplay_quota import TokenBucket
+
+SEARCH_CACHE_FILE = os.path.join('cache', 'search_cache.json')
+
+def normalise_query(query: str) -> str:
+    return ' '.join(query.lower().split())
+
+def normalise_url(url: str) -> str:
+    """Same page → same key (scheme, www., tracking params, fragment, trailing /)"""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    query = urlencode([(k, v) for k, v in parse_qsl(parts.query) if not k.startswith('utm_')])
+    return urlunsplit(('https', host, parts.path.rstrip('/'), query, ''))
+
+# ============================================================================
+# SEARCH CLIENT
+# ============================================================================
+
+class SearchClient:
+    """Cached, rate-limited DuckDuckGo search"""
+
+    def __init__(self, path: str = SEARCH_CACHE_FILE, ttl: timedelta = timedelta(days=3),
+                 requests_per_second: float = 1.0, max_workers: int = 4):
+        self.path = path
+        self.ttl = ttl
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self._pace_lock = threading.Lock()
+        self._limiter = TokenBucket(1, requests_per_second)
+        self._ddgs = None
+        self.entries = self._load()
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except:
+                pass
+        return {}
+
+    def save(self):
+        with self._lock:
+            # Expired queries are dropped on save
+            self.entries = {k: v for k, v in self.entries.items() if not self._expired(v)}
+            try:
+                os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+                tmp_file = self.path + '.tmp'
+                with open(tmp_file, 'w') as f:
+                    json.dump(self.entries, f, indent=2)
+                os.replace(tmp_file, self.path)
+            except Exception as e:
+                print(f"   ⚠️ Could not save search cache: {str(e)[:50]}")
+
+    def _expired(self, entry: Dict) -> bool:
+        try:
+            return datetime.now() - datetime.fromisoformat(entry['fetched']) > self.ttl
+        except (KeyError, ValueError):
+            return True
+
+    def _client(self) -> DDGS:
+        with self._lock:
+            if self._ddgs is None:
+                self._ddgs = DDGS()
+            return self._ddgs
+
+    def _pace(self):
+        """Block until the politeness limiter lets one more query through"""
+        with self._pace_lock:
+            wait = self._limiter.wait_time(1)
+            if wait > 0:
+                time.sleep(wait)
+            self._limiter.take(1)
+
+    def search(self, query: str, max_results: int = 10) -> List[Dict]:
+        key = normalise_query(query)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry and not self._expired(entry) and entry.get('max_results', 0) >= max_results:
+                self.hits += 1
+                return entry['results'][:max_results]
+            self.misses += 1
+
+        try:
+            self._pace()
+            results = [
+                {
+                    'title': r['title'],
+                    'snippet': r['body'],
+                    'url': r['href']
+                }
+                for r in self._client().text(query, max_results=max_results)
+            ]
+        except Exception as e:
+            print(f"   ⚠️ DuckDuckGo search failed: {e}")
+            return []
+
+        with self._lock:
+            self.entries[key] = {
+                'fetched': datetime.now().isoformat(),
+                'max_results': max_results,
+                'results': results
+            }
+        return results
+
+    def search_many(self, queries: List[str], max_results: int = 10) -> Dict[str, List[Dict]]:
+        """{query: results} for all queries, each URL kept only under its first query"""
+        if not queries:
+            return {}
+        with ThreadPoolExecutor(max_workers=min(self.max_workers, len(queries))) as executor:
+            batches = list(executor.map(lambda q: self.search(q, max_results), queries))
+        self.save()
+
+        seen = set()
+        deduped = {}
+        for query, results in zip(queries, batches):
+            deduped[query] = []
+            for result in results:
+                url_key = normalise_url(result['url'])
+                if url_key not in seen:
+                    seen.add(url_key)
+                    deduped[query].append(result)
+        return deduped
+
+_client = None
+_client_lock = threading.Lock()
+
+def get_search_client() -> SearchClient:
+    """Process-wide shared client (one DDGS session, one cache)"""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = SearchClient()
+        return _client
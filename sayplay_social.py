@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY SOCIAL LISTENING
+========================
+
+Pluggable Twitter/X collector for trend research.
+
+- Backends: official X API v2 (TWITTER_BEARER_TOKEN), Nitter scraping
+  (ntscraper) or a replayable JSON fixture (SAYPLAY_SOCIAL_FIXTURES;
+  hand-written sample data in tests/fixtures/tweets.json)
+- Queries run concurrently (one Nitter client per thread); failures
+  are reported per query
+- Tweets cached on disk by id (cache/tweets.json) with a newest-id cursor
+  per query, so each run only asks for tweets newer than the last seen
+"""
+
+import os
+import re
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sayplay_http import get_http_client
+
+TWEET_CACHE_FILE = os.path.join('cache', 'tweets.json')
+TWEET_FIXTURE_FILE = os.path.join('tests', 'fixtures', 'tweets.json')
+
+def _count(value) -> int:
+    """Scraped counters may arrive as '1,204'"""
+    try:
+        return int(str(value).replace(',', '') or 0)
+    except ValueError:
+        return 0
+
+def _nitter_date(value: str) -> str:
+    """Nitter shows 'Oct 15, 2024 · 6:42 PM UTC'; store ISO like the X API"""
+    try:
+        return datetime.strptime(value, '%b %d, %Y · %I:%M %p UTC').isoformat() + 'Z'
+    except (TypeError, ValueError):
+        return value or ''
+
+# ============================================================================
+# BACKENDS
+# ============================================================================
+
+class XApiBackend:
+    """Official X API v2 recent search (since_id handled server-side)"""
+
+    name = 'x-api'
+    URL = 'https://api.twitter.com/2/tweets/search/recent'
+
+    def __init__(self, bearer_token: str):
+        self.bearer_token = bearer_token
+        self.http = get_http_client()
+
+    def search(self, query: str, since_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        params = {
+            'query': f"{query} -is:retweet lang:en",
+            'max_results': max(10, min(limit, 100)),
+            'tweet.fields': 'created_at,public_metrics'
+        }
+        if since_id:
+            params['since_id'] = since_id
+        response = self.http.get(
+            self.URL,
+            params=params,
+            headers={'Authorization': f"Bearer {self.bearer_token}"},
+            timeout=15
+        )
+        response.raise_for_status()
+        return [
+            {
+                'id': t['id'],
+                'text': t['text'],
+                'likes': t.get('public_metrics', {}).get('like_count', 0),
+                'retweets': t.get('public_metrics', {}).get('retweet_count', 0),
+                'created': t.get('created_at', '')
+            }
+            for t in response.json().get('data', [])
+        ]
+
+class NitterBackend:
+    """
+    Free scraping through ntscraper (no since_id: filtered locally).
+    Nitter clients aren't thread-safe: instances are health-checked once,
+    then every query thread gets its own client over the working ones.
+    """
+
+    name = 'nitter'
+
+    def __init__(self):
+        self._instances = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _client(self):
+        from ntscraper import Nitter
+        if getattr(self._local, 'scraper', None) is None:
+            with self._lock:
+                # Nitter() probes every instance on start-up - do it once
+                if self._instances is None:
+                    self._local.scraper = Nitter(log_level=0)
+                    self._instances = list(self._local.scraper.working_instances)
+                    return self._local.scraper
+            if not self._instances:
+                raise RuntimeError('no working Nitter instances')
+            self._local.scraper = Nitter(instances=self._instances, log_level=0, skip_instance_check=True)
+        return self._local.scraper
+
+    def search(self, query: str, since_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        tweets = self._client().get_tweets(query, mode='term', number=limit)
+        results = []
+        for tweet in tweets.get('tweets', []):
+            match = re.search(r'/status/(\d+)', tweet.get('link', ''))
+            if not match:
+                continue
+            if since_id and int(match.group(1)) <= int(since_id):
+                continue
+            stats = tweet.get('stats', {})
+            results.append({
+                'id': match.group(1),
+                'text': tweet.get('text', ''),
+                'likes': _count(stats.get('likes', 0)),
+                'retweets': _count(stats.get('retweets', 0)),
+                'created': _nitter_date(tweet.get('date', ''))
+            })
+        return results
+
+class FixtureBackend:
+    """Replays {query: [tweets]} from a JSON file (offline runs and tests)"""
+
+    name = 'fixture'
+
+    def __init__(self, path: str = TWEET_FIXTURE_FILE):
+        with open(path, 'r') as f:
+            self.fixtures = json.load(f)
+
+    def search(self, query: str, since_id: Optional[str] = None, limit: int = 20) -> List[Dict]:
+        tweets = self.fixtures.get(query, [])
+        return [
+            dict(t) for t in tweets
+            if not since_id or int(t['id']) > int(since_id)
+        ][:limit]
+
+def make_backend():
+    """
+    Fixture if configured (a path, or '1' for the recorded default), else
+    the X API if a token is set, else Nitter
+    """
+    fixtures = os.getenv('SAYPLAY_SOCIAL_FIXTURES')
+    if fixtures:
+        return FixtureBackend(TWEET_FIXTURE_FILE if fixtures == '1' else fixtures)
+    if os.getenv('TWITTER_BEARER_TOKEN'):
+        return XApiBackend(os.getenv('TWITTER_BEARER_TOKEN'))
+    return NitterBackend()
+
+# ============================================================================
+# COLLECTOR
+# ============================================================================
+
+class SocialCollector:
+    """Concurrent, incremental tweet collection with an on-disk cache"""
+
+    KEEP_DAYS = 14
+
+    def __init__(self, backend=None, path: str = TWEET_CACHE_FILE, max_workers: int = 4):
+        self.backend = backend or make_backend()
+        self.path = path
+        self.max_workers = max_workers
+        self._lock = threading.Lock()
+        self.state = self._load()
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    data = json.load(f)
+                data.setdefault('tweets', {})
+                data.setdefault('since', {})
+                return data
+            except:
+                pass
+        return {'tweets': {}, 'since': {}}
+
+    def save(self):
+        cutoff = (datetime.now() - timedelta(days=self.KEEP_DAYS)).isoformat()
+        self.state['tweets'] = {
+            tweet_id: t for tweet_id, t in self.state['tweets'].items()
+            if t.get('seen', '') >= cutoff
+        }
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_file = self.path + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(self.state, f)
+            os.replace(tmp_file, self.path)
+        except Exception as e:
+            print(f"   ⚠️ Could not save tweet cache: {str(e)[:50]}")
+
+    def _fetch(self, query: str, limit: int) -> int:
+        since_id = self.state['since'].get(query)
+        tweets = self.backend.search(query, since_id=since_id, limit=limit)
+        now = datetime.now().isoformat()
+        with self._lock:
+            for tweet in tweets:
+                cached = self.state['tweets'].setdefault(tweet['id'], {**tweet, 'queries': []})
+                cached.update(likes=tweet['likes'], retweets=tweet['retweets'], seen=now)
+                if query not in cached['queries']:
+                    cached['queries'].append(query)
+                if not since_id or int(tweet['id']) > int(since_id):
+                    since_id = tweet['id']
+            if since_id:
+                self.state['since'][query] = since_id
+        return len(tweets)
+
+    def collect(self, queries: List[str], limit: int = 20, top: int = 15) -> List[Dict]:
+        """Fetch new tweets for every query, then rank cached ones by engagement"""
+        def fetch_one(query):
+            try:
+                count = self._fetch(query, limit)
+                print(f"   ✅ {count} new tweets for '{query}' ({self.backend.name})")
+            except Exception as e:
+                print(f"   ⚠️ Twitter query '{query}' failed ({self.backend.name}): {str(e)[:50]}")
+
+        if queries:
+            with ThreadPoolExecutor(max_workers=min(self.max_workers, len(queries))) as executor:
+                list(executor.map(fetch_one, queries))
+            self.save()
+
+        wanted = set(queries)
+        tweets = [t for t in self.state['tweets'].values() if wanted.intersection(t.get('queries', []))]
+        tweets.sort(key=lambda t: t.get('likes', 0) + 2 * t.get('retweets', 0), reverse=True)
+        return [
+            {
+                'id': t['id'],
+                'text': t['text'][:200],
+                'likes': t.get('likes', 0),
+                'created': t.get('created', ''),
+                'source': 'twitter'
+            }
+            for t in tweets[:top]
+        ]
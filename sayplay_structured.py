@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY STRUCTURED GENERATION
+=============================
+
+JSON-schema'd model output for the orchestrators.
+
+- Asks for application/json output when the installed Gemini SDK
+  supports it, and always states the schema in the prompt
+- Parses the whole reply (code fences tolerated) instead of a greedy
+  regex, then validates it against the schema
+- Repair path: only the fields that are missing or malformed are asked
+  for again (with the invalid values shown), and merged into what was
+  already valid
+- Only replies that validate are cached; repairs always reach the model
+"""
+
+import json
+from typing import Callable, Dict, List, Optional, Tuple
+
+_JSON_MODE = None
+
+def json_mode_config() -> Dict:
+    """generation_config for native JSON output (empty on older SDKs)"""
+    global _JSON_MODE
+    if _JSON_MODE is None:
+        try:
+            import google.generativeai as genai
+            genai.types.GenerationConfig(response_mime_type='application/json')
+            _JSON_MODE = {'response_mime_type': 'application/json'}
+        except Exception:
+            _JSON_MODE = {}
+    return dict(_JSON_MODE)
+
+# ============================================================================
+# PARSING + VALIDATION
+# ============================================================================
+
+def parse_json(text: str):
+    """The JSON value in a reply; raises ValueError when there is none"""
+    text = (text or '').strip()
+    if text.startswith('```'):
+        text = text.split('\n', 1)[-1].rsplit('```', 1)[0].strip()
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+
+    # Prose around the JSON: decode from the first position that parses
+    decoder = json.JSONDecoder()
+    for i, char in enumerate(text):
+        if char in '{[':
+            try:
+                return decoder.raw_decode(text, i)[0]
+            except ValueError:
+                continue
+    raise ValueError('no JSON value in response')
+
+_TYPES = {
+    'object': dict,
+    'array': list,
+    'string': str,
+    'integer': int,
+    'number': (int, float),
+    'boolean': bool
+}
+
+def validate(value, schema: Dict, path: str = '$') -> List[Tuple[str, str]]:
+    """(path, problem) for every violation of the (subset) JSON schema"""
+    expected = schema.get('type')
+    if expected and not (isinstance(value, _TYPES[expected]) and
+                         not (expected in ('integer', 'number') and isinstance(value, bool))):
+        return [(path, f"expected {expected}")]
+
+    errors = []
+    if 'enum' in schema and value not in schema['enum']:
+        errors.append((path, f"must be one of {schema['enum']}"))
+    if expected == 'string' and len(value.strip()) < schema.get('minLength', 0):
+        errors.append((path, f"must be at least {schema['minLength']} characters"))
+    if expected == 'array':
+        if len(value) < schema.get('minItems', 0):
+            errors.append((path, f"needs at least {schema['minItems']} items"))
+        if 'maxItems' in schema and len(value) > schema['maxItems']:
+            errors.append((path, f"allows at most {schema['maxItems']} items"))
+        for i, item in enumerate(value):
+            errors.extend(validate(item, schema.get('items', {}), f"{path}[{i}]"))
+    if expected == 'object':
+        for name in schema.get('required', []):
+            if name not in value:
+                errors.append((f"{path}.{name}", 'missing'))
+        for name, sub_schema in schema.get('properties', {}).items():
+            if name in value:
+                errors.extend(validate(value[name], sub_schema, f"{path}.{name}"))
+    return errors
+
+def _field_of(path: str) -> str:
+    """'$.themes[2]' → 'themes'"""
+    return path[2:].split('.')[0].split('[')[0]
+
+# ============================================================================
+# GENERATION
+# ============================================================================
+
+def _schema_prompt(prompt: str, schema: Dict) -> str:
+    return (f"{prompt.rstrip()}\n\n"
+            f"Respond with a single JSON value matching this JSON schema, and nothing else:\n"
+            f"{json.dumps(schema)}")
+
+def _valid_reply(schema: Dict) -> Callable[[str], bool]:
+    def check(text: str) -> bool:
+        try:
+            return not validate(parse_json(text), schema)
+        except ValueError:
+            return False
+    return check
+
+def generate_structured(generate: Callable[[str, Dict, Optional[Callable[[str], bool]]], str],
+                        prompt: str, schema: Dict, max_repairs: int = 1) -> Optional[Dict]:
+    """
+    generate(prompt, config, cache_if) → raw text, where cache_if is the
+    predicate a reply must pass to be cached, or None to bypass the cache.
+    Returns data that passes the schema, or None once the repair budget
+    is spent.
+    """
+    config = json_mode_config()
+    data, errors = None, [('$', 'no response yet')]
+
+    for attempt in range(max_repairs + 1):
+        if data is None:
+            # Nothing usable yet: ask for the whole object
+            ask_prompt = _schema_prompt(prompt, schema)
+            if attempt:
+                ask_prompt += "\n\nThe previous reply was not valid JSON."
+            try:
+                data = parse_json(generate(ask_prompt, config, _valid_reply(schema)))
+            except ValueError:
+                data = None
+                continue
+        else:
+            # Re-ask only for the fields that failed
+            fields = sorted({_field_of(path) for path, _ in errors if _field_of(path)})
+            if schema.get('type') != 'object' or not fields:
+                data = None
+                continue
+            sub_schema = {
+                'type': 'object',
+                'properties': {name: schema['properties'][name] for name in fields if name in schema.get('properties', {})},
+                'required': fields
+            }
+            problems = '\n'.join(f"- {path[2:]}: {problem}" for path, problem in errors)
+            previous = json.dumps({name: data.get(name) for name in fields})
+            print(f"   🔧 Repairing fields: {', '.join(fields)}")
+            try:
+                patch = parse_json(generate(
+                    _schema_prompt(f"{prompt.rstrip()}\n\nYour previous answer had these values:\n{previous}\n\n"
+                                   f"Fix these fields:\n{problems}",
+                                   sub_schema),
+                    config,
+                    None
+                ))
+            except ValueError:
+                continue
+            if isinstance(patch, dict):
+                data.update({name: patch[name] for name in fields if name in patch})
+
+        errors = validate(data, schema)
+        if not errors:
+            return data
+
+    print(f"   ⚠️ Structured output still invalid: {errors[:3]}")
+    return None
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY TIKTOK HASHTAG TRACKER
+==============================
+
+Real view/video counts for a tracked set of TikTok hashtags.
+
+- All hashtags fetched in parallel with a short timeout each, and the
+  whole collection bounded by a deadline (no retries)
+- One dated snapshot per hashtag per day (cache/tiktok_snapshots.json)
+- Growth = views gained per day between the two latest snapshots
+- Source slow or down, or a tag not back by the deadline → last
+  snapshot served, marked 'cached'
+- rank() orders hashtags by growth, then reach, for social captions
+"""
+
+import os
+import json
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from sayplay_http import get_http_client
+
+TIKTOK_SNAPSHOT_FILE = os.path.join('cache', 'tiktok_snapshots.json')
+CHALLENGE_URL = 'https://www.tiktok.com/api/challenge/detail/'
+USER_AGENT = ('Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+              '(KHTML, like Gecko) Chrome/120.0 Safari/537.36')
+
+# ============================================================================
+# HASHTAG TRACKER
+# ============================================================================
+
+class TikTokHashtagTracker:
+    """Parallel hashtag stats with a dated snapshot store"""
+
+    KEEP_SNAPSHOTS = 60
+
+    def __init__(self, hashtags: List[str], path: str = TIKTOK_SNAPSHOT_FILE,
+                 timeout: float = 8, deadline: float = 15):
+        self.hashtags = [tag.lstrip('#').lower() for tag in hashtags]
+        self.path = path
+        self.timeout = timeout
+        self.deadline = deadline
+        self.http = get_http_client()
+        self._lock = threading.Lock()
+        self.snapshots = self._load()
+
+    def _load(self) -> Dict:
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, 'r') as f:
+                    return json.load(f)
+            except:
+                pass
+        return {}
+
+    def save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_file = self.path + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump(self.snapshots, f, indent=2)
+            os.replace(tmp_file, self.path)
+        except Exception as e:
+            print(f"   ⚠️ Could not save TikTok snapshots: {str(e)[:50]}")
+
+    def _fetch(self, tag: str, timeout: float) -> Dict:
+        response = self.http.get(
+            CHALLENGE_URL,
+            params={'challengeName': tag},
+            headers={'User-Agent': USER_AGENT, 'Referer': f"https://www.tiktok.com/tag/{tag}"},
+            timeout=timeout
+        )
+        response.raise_for_status()
+        info = response.json().get('challengeInfo', {})
+        stats = info.get('statsV2') or info.get('stats') or {}
+        views = int(stats.get('viewCount', 0) or 0)
+        if not views:
+            raise ValueError('no stats in response')
+        return {'views': views, 'videos': int(stats.get('videoCount', 0) or 0)}
+
+    def _record(self, tag: str, stats: Dict):
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self._lock:
+            history = [s for s in self.snapshots.get(tag, []) if s['date'] != today]
+            history.append({'date': today, **stats})
+            self.snapshots[tag] = history[-self.KEEP_SNAPSHOTS:]
+
+    @staticmethod
+    def growth(history: List[Dict]) -> Optional[float]:
+        """% views gained per day between the two latest snapshots"""
+        if len(history) < 2:
+            return None
+        previous, latest = history[-2], history[-1]
+        days = (datetime.fromisoformat(latest['date']) - datetime.fromisoformat(previous['date'])).days
+        if days <= 0 or not previous['views']:
+            return None
+        return round((latest['views'] - previous['views']) / previous['views'] / days * 100, 3)
+
+    def collect(self) -> List[Dict]:
+        """Live stats where the source answers in time, last snapshot where it doesn't"""
+        stop_at = time.time() + self.deadline
+
+        def fetch_one(tag):
+            timeout = min(self.timeout, max(stop_at - time.time(), 0.5))
+            return self._fetch(tag, timeout)
+
+        executor = ThreadPoolExecutor(max_workers=len(self.hashtags) or 1)
+        futures = {executor.submit(fetch_one, tag): tag for tag in self.hashtags}
+        done, _ = wait(futures, timeout=self.deadline)
+        # Stragglers are abandoned; their results are never recorded
+        executor.shutdown(wait=False, cancel_futures=True)
+
+        live = {}
+        for future in done:
+            tag = futures[future]
+            try:
+                self._record(tag, future.result())
+                live[tag] = True
+            except Exception:
+                pass
+        if live:
+            self.save()
+
+        stale_before = (datetime.now() - timedelta(days=7)).strftime('%Y-%m-%d')
+        results = []
+        for tag in self.hashtags:
+            history = self.snapshots.get(tag, [])
+            latest = history[-1] if history else {}
+            results.append({
+                'hashtag': f'#{tag}',
+                'views': latest.get('views'),
+                'videos': latest.get('videos'),
+                'growth_per_day': self.growth(history),
+                'as_of': latest.get('date'),
+                'source': 'live' if live.get(tag) else 'cached' if latest else 'unavailable',
+                'relevance': 'gifts',
+                'stale': bool(latest) and latest['date'] < stale_before
+            })
+        print(f"   ✅ TikTok: {sum(live.values())} live, "
+              f"{sum(1 for r in results if r['source'] == 'cached')} cached hashtags")
+        return results
+
+    @staticmethod
+    def rank(metrics: List[Dict], limit: int = 5) -> List[str]:
+        """Hashtags with data, fastest-growing first (reach breaks ties)"""
+        usable = [m for m in metrics if m.get('views')]
+        usable.sort(key=lambda m: (m.get('growth_per_day') or 0, m['views']), reverse=True)
+        return [m['hashtag'] for m in usable[:limit]]
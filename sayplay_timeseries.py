@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+SAYPLAY TREND TIME-SERIES STORE
+===============================
+
+Incremental keyword × date → interest store for Google Trends data.
+
+- Columnar: one shared date column, one value column per keyword
+- Each run only fetches dates after what's already stored (plus a
+  short overlap used to stitch the new payload onto the old scale)
+- 7-day deltas and 90-day trends are answered locally, no network
+- Stored in cache/trend_series_<geo>.json (committed by the workflow)
+- GoogleTrendsCollector fills it from pytrends for every entry point
+"""
+
+import os
+import json
+import threading
+import time
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+TREND_SERIES_DIR = 'cache'
+
+def classify_slope(values: List[float]) -> Dict:
+    """Least-squares slope, expressed as change over the window vs. the mean"""
+    n = len(values)
+    mean = sum(values) / n if n else 0.0
+    if n < 2 or mean == 0:
+        return {'slope': 0.0, 'trend': 'stable'}
+
+    x_mean = (n - 1) / 2
+    slope = sum((i - x_mean) * (v - mean) for i, v in enumerate(values)) / \
+        sum((i - x_mean) ** 2 for i in range(n))
+    relative = slope * n / mean
+    trend = 'rising' if relative > 0.15 else 'falling' if relative < -0.15 else 'stable'
+    return {'slope': round(relative, 3), 'trend': trend}
+
+# ============================================================================
+# TIME-SERIES STORE
+# ============================================================================
+
+class TrendSeriesStore:
+    """Daily interest per keyword, appended to run by run"""
+
+    OVERLAP_DAYS = 7
+    KEEP_DAYS = 400
+
+    def __init__(self, geo: str = 'GB', directory: str = TREND_SERIES_DIR):
+        self.geo = geo
+        self.path = os.path.join(directory, f"trend_series_{geo}.json")
+        self._lock = threading.Lock()
+        self.dates: List[str] = []
+        self.columns: Dict[str, List[Optional[float]]] = {}
+        self.checked: Dict[str, str] = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            self.dates = data.get('dates', [])
+            self.columns = data.get('columns', {})
+            self.checked = data.get('checked', {})
+        except Exception as e:
+            print(f"   ⚠️ Trend series unreadable, starting fresh: {str(e)[:50]}")
+
+    def save(self):
+        with self._lock:
+            # Old dates are dropped from every column at once
+            cutoff = (datetime.now() - timedelta(days=self.KEEP_DAYS)).strftime('%Y-%m-%d')
+            start = next((i for i, d in enumerate(self.dates) if d >= cutoff), len(self.dates))
+            if start:
+                self.dates = self.dates[start:]
+                self.columns = {kw: values[start:] for kw, values in self.columns.items()}
+
+            os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+            tmp_file = self.path + '.tmp'
+            with open(tmp_file, 'w') as f:
+                json.dump({'dates': self.dates, 'columns': self.columns, 'checked': self.checked}, f)
+            os.replace(tmp_file, self.path)
+
+    def _last_date(self, keyword: str) -> Optional[str]:
+        values = self.columns.get(keyword, [])
+        for date, value in zip(reversed(self.dates), reversed(values)):
+            if value is not None:
+                return date
+        return None
+
+    def checked_today(self, keywords: List[str]) -> bool:
+        today = datetime.now().strftime('%Y-%m-%d')
+        return all(self.checked.get(kw) == today for kw in keywords)
+
+    def fetch_start(self, keywords: List[str], days: int = 90) -> datetime:
+        """
+        First date a fetch for keywords needs: the oldest 'last stored date'
+        minus the stitching overlap, or a full window for new keywords
+        """
+        full_window = datetime.now() - timedelta(days=days)
+        lasts = [self._last_date(kw) for kw in keywords]
+        # All-zero history (e.g. scaled against a far bigger term) is refetched
+        if any(last is None or not any(self.window(kw, days)) for kw, last in zip(keywords, lasts)):
+            return full_window
+        start = datetime.fromisoformat(min(lasts)) - timedelta(days=self.OVERLAP_DAYS)
+        return max(start, full_window)
+
+    def _column(self, keyword: str) -> List[Optional[float]]:
+        return self.columns.setdefault(keyword, [None] * len(self.dates))
+
+    def _insert_dates(self, dates: List[str]):
+        """Add new dates to the date column, keeping every column aligned"""
+        new = sorted(set(dates) - set(self.dates))
+        if not new:
+            return
+        if not self.dates or new[0] > self.dates[-1]:
+            self.dates.extend(new)
+            for values in self.columns.values():
+                values.extend([None] * len(new))
+            return
+
+        merged = sorted(set(self.dates) | set(new))
+        for kw, values in self.columns.items():
+            by_date = dict(zip(self.dates, values))
+            self.columns[kw] = [by_date.get(d) for d in merged]
+        self.dates = merged
+
+    def overlap_factor(self, reference: str, dates: List[str], values: List[float]) -> Optional[float]:
+        """
+        Factor that maps a fresh payload onto the stored scale, from the
+        reference column's overlap (None when nothing overlaps yet)
+        """
+        stored = dict(zip(self.dates, self.columns.get(reference, [])))
+        pairs = [(stored[d], v) for d, v in zip(dates, values) if stored.get(d) is not None]
+        old_sum = sum(old for old, _ in pairs)
+        new_sum = sum(new for _, new in pairs)
+        if not pairs or not old_sum or not new_sum:
+            return None
+        return old_sum / new_sum
+
+    def merge(self, dates: List[str], series: Dict[str, List[float]], factor: float = 1.0):
+        """Write (scaled) values; fresh values overwrite the overlap"""
+        with self._lock:
+            self._insert_dates(dates)
+            position = {d: i for i, d in enumerate(self.dates)}
+            today = datetime.now().strftime('%Y-%m-%d')
+            for kw, values in series.items():
+                column = self._column(kw)
+                for date, value in zip(dates, values):
+                    column[position[date]] = round(value * factor, 3)
+                self.checked[kw] = today
+
+    def mark_checked(self, keywords: List[str]):
+        today = datetime.now().strftime('%Y-%m-%d')
+        with self._lock:
+            for kw in keywords:
+                self.checked[kw] = today
+
+    def window(self, keyword: str, days: int = 90) -> List[float]:
+        """Stored values for the last `days` days, oldest first"""
+        cutoff = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
+        values = self.columns.get(keyword, [])
+        return [v for d, v in zip(self.dates, values) if d > cutoff and v is not None]
+
+    def delta(self, keyword: str, days: int = 7) -> Optional[float]:
+        """% change of the last `days` days vs. the `days` before them"""
+        values = self.window(keyword, days * 2 + 3)
+        if len(values) < days * 2:
+            return None
+        recent = sum(values[-days:]) / days
+        previous = sum(values[-days * 2:-days]) / days
+        if not previous:
+            return None
+        return round((recent - previous) / previous * 100, 1)
+
+    def trend(self, keyword: str, days: int = 90) -> Dict:
+        return classify_slope(self.window(keyword, days))
+
+# ============================================================================
+# GOOGLE TRENDS COLLECTOR
+# ============================================================================
+
+class GoogleTrendsCollector:
+    """
+    Batched, incremental Google Trends queries:
+    - up to 5 keywords fit one payload and are compared directly; longer
+      lists go 4 at a time plus the first keyword as anchor. A generic
+      anchor ('gifts') would dwarf niche terms down to 0 on its scale
+    - only dates missing from the local time-series store are fetched;
+      each payload is stitched onto the stored scale via a keyword the
+      store already holds for the overlapping dates
+    - scores, 7-day deltas and 90-day trends come from the local store
+    """
+
+    PAYLOAD_SIZE = 5  # pytrends maximum
+    BATCH_SIZE = 4
+    WINDOW_DAYS = 90
+
+    def __init__(self, geo: str = 'GB', store: Optional[TrendSeriesStore] = None):
+        self.geo = geo
+        self.store = store or TrendSeriesStore(geo)
+        self._pytrends = None
+
+    def _fetch(self, keywords: List[str]):
+        """Pull the missing date range for one payload into the store"""
+        if self.store.checked_today(keywords):
+            return
+
+        start = self.store.fetch_start(keywords, self.WINDOW_DAYS)
+        timeframe = f"{start.strftime('%Y-%m-%d')} {datetime.now().strftime('%Y-%m-%d')}"
+        if self._pytrends is None:
+            from pytrends.request import TrendReq
+            self._pytrends = TrendReq(hl='en-GB', tz=0)
+        self._pytrends.build_payload(keywords, timeframe=timeframe, geo=self.geo)
+        interest = self._pytrends.interest_over_time()
+        time.sleep(2)  # Be polite between live payloads
+
+        if interest.empty:
+            self.store.mark_checked(keywords)
+            return
+
+        dates = [d.strftime('%Y-%m-%d') for d in interest.index]
+        series = {kw: [float(v) for v in interest[kw].tolist()] for kw in keywords if kw in interest}
+
+        # Overlap of an already-stored keyword (the largest one, so it isn't
+        # all zeros) maps this payload onto the stored scale; the very
+        # first payload defines that scale
+        factor = 1.0
+        for reference in sorted(series, key=lambda kw: sum(series[kw]), reverse=True):
+            overlap = self.store.overlap_factor(reference, dates, series[reference])
+            if overlap:
+                factor = overlap
+                break
+        self.store.merge(dates, series, factor)
+        print(f"   📥 Trends {timeframe}: {len(dates)} days for {len(series)} terms")
+
+    def collect(self, keywords: List[str]) -> List[Dict]:
+        if len(keywords) <= self.PAYLOAD_SIZE:
+            batches = [keywords]
+        else:
+            anchor, rest = keywords[0], keywords[1:]
+            batches = [[anchor] + rest[i:i + self.BATCH_SIZE] for i in range(0, len(rest), self.BATCH_SIZE)]
+        for batch in batches:
+            try:
+                self._fetch(batch)
+            except Exception as e:
+                print(f"   ⚠️ Trends batch failed: {str(e)[:50]}")
+        self.store.save()
+
+        windows = {kw: self.store.window(kw, self.WINDOW_DAYS) for kw in keywords}
+        windows = {kw: values for kw, values in windows.items() if values}
+        if not windows:
+            return []
+
+        # Back onto a 0-100 scale shared by every keyword
+        peak = max(max(values) for values in windows.values()) or 1.0
+        results = []
+        for kw, values in windows.items():
+            normalised = [v * 100 / peak for v in values]
+            results.append({
+                'keyword': kw,
+                'interest_score': int(sum(normalised) / len(normalised)),
+                'delta_7d': self.store.delta(kw, 7),
+                **classify_slope(normalised)
+            })
+        return results